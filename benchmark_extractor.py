@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite for the Recipe Extractor
+Times every extraction stage on the bundled export and on synthetic exports
+scaled up from it, and checks the output against the committed golden files
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+
+from recipe_extractor import RecipeExtractor
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_EXPORT = os.path.join(BASE_DIR, 'kerzmaneat_1763203806174.json')
+GOLDEN_RECIPES = os.path.join(BASE_DIR, 'recipes_extracted.json')
+GOLDEN_SUMMARY = os.path.join(BASE_DIR, 'extraction_summary.json')
+
+
+def make_scaled_export(source: str, scale: int, target: str):
+    """Write a synthetic export with the messages of ``source`` repeated ``scale`` times"""
+    with open(source, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    messages = data.pop('messages', [])
+    id_step = max((m.get('id', 0) for m in messages), default=0) + 1
+    
+    with open(target, 'w', encoding='utf-8') as f:
+        header = json.dumps({**data, 'totalMessages': len(messages) * scale}, ensure_ascii=False)
+        f.write(header[:-1] + (', ' if data else '') + '"messages": [')
+        first = True
+        for copy in range(scale):
+            for message in messages:
+                if not first:
+                    f.write(',\n')
+                first = False
+                f.write(json.dumps(dict(message, id=message.get('id', 0) + copy * id_step),
+                                   ensure_ascii=False))
+        f.write(']}')
+
+
+def run_benchmark(export_file: str, allocations: bool = False) -> Dict:
+    """Extract ``export_file`` once with every stage timed; meant to run in a fresh process"""
+    extractor = RecipeExtractor(export_file)
+    metrics = extractor.enable_profiling()
+    
+    if allocations:
+        tracemalloc.start()
+    
+    with tempfile.TemporaryDirectory() as tmp_dir, open(os.devnull, 'w') as devnull:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(devnull):
+            extractor.extract_recipes()
+            extractor.save_recipes(os.path.join(tmp_dir, 'recipes.json'))
+        elapsed = time.perf_counter() - start
+    
+    result = {
+        'export': export_file,
+        'messages': extractor.message_count,
+        'recipes': len(extractor.recipes),
+        'seconds': round(elapsed, 3),
+        'messages_per_sec': round(extractor.message_count / elapsed, 1) if elapsed else None,
+        # ru_maxrss is in KiB on Linux and bytes on macOS
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                             / (1 << 20 if sys.platform == 'darwin' else 1 << 10), 1),
+        'stages': metrics.report(elapsed, extractor.message_count, len(extractor.recipes))['stages'],
+    }
+    if allocations:
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['peak_traced_mb'] = round(peak / (1 << 20), 1)
+        result['live_allocations'] = sum(stat.count for stat in snapshot.statistics('filename'))
+    return result
+
+
+def run_isolated(export_file: str, allocations: bool) -> Dict:
+    """Run one benchmark in a child process so peak RSS is not shared between runs"""
+    cmd = [sys.executable, os.path.abspath(__file__), '--run-one', export_file]
+    if allocations:
+        cmd.append('--allocations')
+    output = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _load_recipes(path: str) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['recipes']
+
+
+def check_golden(export_file: str = DEFAULT_EXPORT) -> List[str]:
+    """Compare a fresh extraction with the committed outputs; returns a list of differences"""
+    problems = []
+    extractor = RecipeExtractor(export_file)
+    with tempfile.TemporaryDirectory() as tmp_dir, open(os.devnull, 'w') as devnull:
+        output_file = os.path.join(tmp_dir, 'recipes.json')
+        with contextlib.redirect_stdout(devnull):
+            extractor.extract_recipes()
+            extractor.save_recipes(output_file)
+        summary = extractor.generate_summary()
+        actual = _load_recipes(output_file)
+    
+    expected = _load_recipes(GOLDEN_RECIPES)
+    if len(actual) != len(expected):
+        problems.append(f"recipe count {len(actual)} != golden {len(expected)}")
+    for got, want in zip(actual, expected):
+        if got != want:
+            fields = sorted(k for k in set(got) | set(want) if got.get(k) != want.get(k))
+            problems.append(f"{want.get('id')}: differs in {', '.join(fields)}")
+    
+    with open(GOLDEN_SUMMARY, 'r', encoding='utf-8') as f:
+        golden_summary = json.load(f)
+    for key, value in golden_summary.items():
+        # Compared as JSON, so the order of ranked counts matters too
+        if json.dumps(summary.get(key), ensure_ascii=False) != json.dumps(value, ensure_ascii=False):
+            problems.append(f"summary '{key}' differs")
+    return problems
+
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Benchmark the recipe extraction pipeline")
+    parser.add_argument('--export', default=DEFAULT_EXPORT,
+                        help="Telegram export used as the 1x dataset")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100],
+                        help="Dataset sizes as multiples of the export (default: 1 10 100)")
+    parser.add_argument('--allocations', action='store_true',
+                        help="Also trace Python allocations (much slower)")
+    parser.add_argument('--save', metavar='FILE',
+                        help="Write results as JSON, e.g. to use as a later --baseline")
+    parser.add_argument('--baseline', metavar='FILE',
+                        help="Fail if throughput dropped versus these saved results")
+    parser.add_argument('--max-slowdown', type=float, default=0.2,
+                        help="Tolerated throughput drop versus --baseline (default: 0.2 = 20%%)")
+    parser.add_argument('--skip-golden', action='store_true',
+                        help="Do not check output against recipes_extracted.json")
+    parser.add_argument('--run-one', metavar='EXPORT', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def compare_baseline(results: Dict, baseline_file: str, max_slowdown: float) -> List[str]:
+    """Throughput regressions of ``results`` versus a saved run"""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    problems = []
+    for scale, run in results['runs'].items():
+        before = baseline.get('runs', {}).get(scale)
+        if not before or not before.get('messages_per_sec'):
+            continue
+        ratio = run['messages_per_sec'] / before['messages_per_sec']
+        if ratio < 1 - max_slowdown:
+            problems.append(f"{scale}x: {run['messages_per_sec']} msg/s vs baseline "
+                            f"{before['messages_per_sec']} msg/s ({ratio:.0%})")
+    return problems
+
+
+def main(argv=None):
+    """Main execution function"""
+    args = parse_args(argv)
+    
+    if args.run_one:
+        print(json.dumps(run_benchmark(args.run_one, args.allocations)))
+        return 0
+    
+    print("=" * 70)
+    print("RECIPE EXTRACTOR BENCHMARK")
+    print("=" * 70)
+    
+    problems = []
+    results = {'runs': {}}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for scale in args.scales:
+            export_file = args.export
+            if scale != 1:
+                export_file = os.path.join(tmp_dir, f'export_x{scale}.json')
+                make_scaled_export(args.export, scale, export_file)
+            
+            run = run_isolated(export_file, args.allocations)
+            run['export'] = f"{os.path.basename(args.export)} x{scale}"
+            results['runs'][str(scale)] = run
+            
+            print(f"\n📦 {run['export']}: {run['messages']} messages, {run['recipes']} recipes")
+            print(f"  • {run['seconds']} s, {run['messages_per_sec']} messages/sec, "
+                  f"peak RSS {run['peak_rss_mb']} MB")
+            if 'peak_traced_mb' in run:
+                print(f"  • peak traced {run['peak_traced_mb']} MB, "
+                      f"{run['live_allocations']} live allocations at end")
+            for stage, timing in run['stages'].items():
+                print(f"  • {stage}: {timing['seconds']} s in {timing['calls']} calls")
+            
+            if scale != 1:
+                os.remove(export_file)
+    
+    if not args.skip_golden:
+        golden_problems = check_golden()
+        if golden_problems:
+            print(f"\n✗ Output differs from {os.path.basename(GOLDEN_RECIPES)}:")
+            for problem in golden_problems[:20]:
+                print(f"  • {problem}")
+        else:
+            print(f"\n✓ Output matches {os.path.basename(GOLDEN_RECIPES)} "
+                  f"and {os.path.basename(GOLDEN_SUMMARY)}")
+        problems.extend(golden_problems)
+    
+    if args.baseline:
+        slowdowns = compare_baseline(results, args.baseline, args.max_slowdown)
+        for slowdown in slowdowns:
+            print(f"✗ Throughput regression: {slowdown}")
+        if not slowdowns:
+            print(f"✓ Throughput within {args.max_slowdown:.0%} of {args.baseline}")
+        problems.extend(slowdowns)
+    
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"✓ Saved results to {args.save}")
+    
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Load Test for the Recipe Query Service
+Starts the service on a free local port and fires a realistic mix of
+search/filter/page requests from concurrent clients, reporting latency
+percentiles and requests per second
+"""
+
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from typing import Dict, List
+from urllib.parse import urlencode
+
+from recipe_model import Recipe
+from recipe_query_service import DEFAULT_CATALOG, RecipeQueryIndex, load_recipes, make_server
+
+
+def make_queries(recipes: List[Recipe], count: int, seed: int = 0) -> List[str]:
+    """Request paths drawn from the catalog's own words and facets.
+    
+    A small set of distinct queries is sampled with a skewed distribution,
+    so a few of them are hot, as with real users opening the app.
+    """
+    rng = random.Random(seed)
+    words = sorted({word for recipe in recipes for word in recipe.title.lower().split() if len(word) > 3})
+    categories = sorted({category for recipe in recipes for category in recipe.categories})
+    cuisines = sorted({recipe.cuisine for recipe in recipes if recipe.cuisine})
+    
+    distinct = []
+    for _ in range(max(1, count // 20)):
+        params = []
+        if rng.random() < 0.5 and words:
+            params.append(('search', rng.choice(words)[:rng.randint(3, 6)]))
+        if rng.random() < 0.4:
+            params.append(('category', rng.choice(categories)))
+        if rng.random() < 0.2:
+            params.append(('cuisine', rng.choice(cuisines)))
+        if rng.random() < 0.2:
+            params.append(('difficulty', rng.choice(['Легко', 'Средне', 'Сложно'])))
+        if rng.random() < 0.2:
+            params.append(('max_time', rng.choice([15, 30, 60])))
+        params.append(('page', rng.choice([1, 1, 1, 2, 3])))
+        distinct.append('/recipes?' + urlencode(params))
+    
+    weights = [1 / (rank + 1) for rank in range(len(distinct))]
+    return rng.choices(distinct, weights, k=count)
+
+
+def _client(host: str, port: int, paths: List[str], latencies: List[float], errors: List[str]):
+    connection = http.client.HTTPConnection(host, port)
+    for path in paths:
+        start = time.perf_counter()
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(f"{response.status} {path}")
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(f"{e} {path}")
+            connection.close()
+            connection = http.client.HTTPConnection(host, port)
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_load_test(catalog: str, requests: int, clients: int, cache_size: int) -> Dict:
+    """Serve ``catalog`` in a background thread and measure ``requests`` requests"""
+    recipes = load_recipes(catalog)
+    index = RecipeQueryIndex(recipes, cache_size)
+    server = make_server(index, port=0)
+    host, port = server.server_address[:2]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    
+    paths = make_queries(recipes, requests)
+    latencies = []
+    errors = []
+    workers = [
+        threading.Thread(target=_client, args=(host, port, paths[i::clients], latencies, errors))
+        for i in range(clients)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    
+    server.shutdown()
+    server.server_close()
+    return {
+        'catalog': catalog,
+        'recipes': len(recipes),
+        'requests': len(latencies),
+        'clients': clients,
+        'errors': len(errors),
+        'seconds': round(elapsed, 3),
+        'requests_per_sec': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'max_ms': round(max(latencies) * 1000, 2),
+        'cache_hit_rate': round(index.cache.hits / max(1, index.cache.hits + index.cache.misses), 3),
+    }
+
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Load test the recipe query service")
+    parser.add_argument('catalog', nargs='?', default=DEFAULT_CATALOG,
+                        help="Extractor output: recipes JSON or a .cols columnar catalog")
+    parser.add_argument('-n', '--requests', type=int, default=5000,
+                        help="Total number of requests (default: 5000)")
+    parser.add_argument('-c', '--clients', type=int, default=8,
+                        help="Concurrent keep-alive clients (default: 8)")
+    parser.add_argument('--cache-size', type=int, default=1024, metavar='N',
+                        help="Query cache size; 0 disables caching (default: 1024)")
+    parser.add_argument('--save', metavar='FILE', help="Write results as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Main execution function"""
+    args = parse_args(argv)
+    
+    print("=" * 70)
+    print("RECIPE QUERY SERVICE LOAD TEST")
+    print("=" * 70)
+    
+    result = run_load_test(args.catalog, args.requests, args.clients, args.cache_size)
+    print(f"\n📦 {result['recipes']} recipes, {result['requests']} requests from {result['clients']} clients")
+    print(f"  • {result['requests_per_sec']} requests/sec over {result['seconds']} s")
+    print(f"  • latency p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms, max {result['max_ms']} ms")
+    print(f"  • cache hit rate {result['cache_hit_rate']:.0%}, {result['errors']} errors")
+    
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"✓ Saved results to {args.save}")
+    
+    return 1 if result['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""
+Recipe Catalog Files
+Sharded and versioned catalog payloads for the Mini App
+"""
+
+import contextlib
+import glob
+import gzip
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, Iterable, Iterator, List
+
+from recipe_model import Recipe
+
+
+class ShardWriter:
+    """Writes recipes as a slim listing manifest plus content-hashed shards.
+    
+    Shards of the previous manifest are kept for one more run, so clients
+    holding it can still fetch them.
+    """
+    
+    MANIFEST_FIELDS = ('id', 'title', 'categories', 'cuisine', 'difficulty', 'cooking_time')
+    
+    def __init__(self, output_dir: str, shard_size: int = 50):
+        self.output_dir = output_dir
+        self.shard_size = shard_size
+        self.shards = []
+        self.listing = []
+        self.pending = []
+        os.makedirs(output_dir, exist_ok=True)
+    
+    def add(self, recipe: Recipe):
+        body = recipe.to_dict()
+        entry = {field: body[field] for field in self.MANIFEST_FIELDS if field in body}
+        entry['shard'] = len(self.shards)
+        self.listing.append(entry)
+        self.pending.append(body)
+        if len(self.pending) >= self.shard_size:
+            self._flush()
+    
+    def _flush(self):
+        if not self.pending:
+            return
+        content = json.dumps(self.pending, ensure_ascii=False, separators=(',', ':'))
+        name = f"recipes-{hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]}.json"
+        with open(os.path.join(self.output_dir, name), 'w', encoding='utf-8') as f:
+            f.write(content)
+        self.shards.append(name)
+        self.pending = []
+    
+    def close(self, metadata: Dict) -> str:
+        """Write the last shard and the manifest; returns the manifest path"""
+        self._flush()
+        manifest_file = os.path.join(self.output_dir, 'manifest.json')
+        try:
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                previous = json.load(f)['shards']
+        except (OSError, ValueError, KeyError, TypeError):
+            previous = []
+        manifest = {'metadata': metadata, 'shards': self.shards, 'recipes': self.listing}
+        with open(manifest_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+        
+        # Shards neither the new nor the previous manifest references
+        keep = set(self.shards) | set(previous)
+        for path in glob.glob(os.path.join(glob.escape(self.output_dir), 'recipes-*.json')):
+            if os.path.basename(path) not in keep:
+                os.remove(path)
+        return manifest_file
+
+
+# Bytes read at a time when compressing catalog files
+COMPRESS_CHUNK_SIZE = 1 << 16
+
+
+def recipe_hash(body: Dict) -> str:
+    """Content hash of a recipe dict; the order of categories and tags does not count"""
+    canonical = dict(body)
+    for field in ('categories', 'tags'):
+        if field in canonical:
+            canonical[field] = sorted(canonical[field])
+    content = json.dumps(canonical, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+
+def write_compressed_variants(path: str) -> List[str]:
+    """Write ``path.gz`` and, when the brotli module is installed, ``path.br``;
+    returns the variant paths. The file is compressed chunk by chunk."""
+    variants = [path + '.gz']
+    with open(path, 'rb') as src, open(path + '.gz', 'wb') as raw, \
+            gzip.GzipFile(filename='', mode='wb', compresslevel=9, fileobj=raw, mtime=0) as dst:
+        shutil.copyfileobj(src, dst, COMPRESS_CHUNK_SIZE)
+    try:
+        import brotli
+    except ImportError:
+        return variants
+    compressor = brotli.Compressor(quality=11)
+    with open(path, 'rb') as src, open(path + '.br', 'wb') as dst:
+        for chunk in iter(lambda: src.read(COMPRESS_CHUNK_SIZE), b''):
+            dst.write(compressor.process(chunk))
+        dst.write(compressor.finish())
+    variants.append(path + '.br')
+    return variants
+
+
+class CatalogVersionWriter:
+    """Writes a versioned catalog plus a delta against the previous version.
+    
+    The version only moves when a recipe was added, changed, removed or
+    reordered; every file gets pre-compressed variants. Only ids and hashes
+    stay in memory: bodies are spooled to temporary files, and the previous
+    hashes are read from a small sidecar of the snapshot.
+    """
+    
+    POINTER = 'versions.json'
+    
+    def __init__(self, output_dir: str, keep_deltas: int = 30):
+        self.output_dir = output_dir
+        self.keep_deltas = keep_deltas
+        os.makedirs(output_dir, exist_ok=True)
+        
+        self.pointer = {'version': 0, 'catalog': None, 'deltas': []}
+        self.previous = {}
+        try:
+            with open(os.path.join(output_dir, self.POINTER), 'r', encoding='utf-8') as f:
+                self.pointer = json.load(f)
+            # Catalogs written before the sidecar existed carry the hashes themselves
+            hashes_file = self.pointer.get('hashes') or self.pointer['catalog']
+            with open(os.path.join(output_dir, hashes_file), 'r', encoding='utf-8') as f:
+                self.previous = json.load(f)['hashes']
+        except (OSError, ValueError, KeyError, TypeError):
+            # Without the previous snapshot there is nothing to diff against; the
+            # version still moves forward so clients never see a number twice
+            self.pointer = {'version': self.pointer.get('version', 0), 'catalog': None, 'deltas': []}
+        
+        self.hashes = {}
+        self.added = []
+        self.changed = []
+        self.spool = tempfile.TemporaryFile('w+', encoding='utf-8', dir=output_dir)
+        # Added ("a") and changed ("c") bodies, one per line, when a delta will be written
+        self.delta_spool = (tempfile.TemporaryFile('w+', encoding='utf-8', dir=output_dir)
+                            if self.pointer['catalog'] else None)
+    
+    def add(self, recipe: Recipe):
+        body = recipe.to_dict()
+        digest = recipe_hash(body)
+        self.hashes[body['id']] = digest
+        dumped = json.dumps(body, ensure_ascii=False, separators=(',', ':'))
+        previous = self.previous.get(body['id'])
+        if previous is None:
+            self.added.append(body['id'])
+            self._spool_delta('a', dumped)
+        elif previous != digest:
+            self.changed.append(body['id'])
+            self._spool_delta('c', dumped)
+        if len(self.hashes) > 1:
+            self.spool.write(',')
+        self.spool.write(dumped)
+    
+    def _spool_delta(self, kind: str, dumped: str):
+        if self.delta_spool is not None:
+            self.delta_spool.write(kind + dumped + '\n')
+    
+    def _spooled(self, kind: str) -> Iterator[str]:
+        """Comma-separated bodies of one kind from the delta spool"""
+        self.delta_spool.seek(0)
+        separator = ''
+        for line in self.delta_spool:
+            if line[0] == kind:
+                yield separator + line[1:-1]
+                separator = ','
+    
+    def _write(self, name: str, content: Iterable[str], compress: bool = True) -> Dict:
+        path = os.path.join(self.output_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            for part in content:
+                f.write(part)
+        if not compress:
+            return {'file': name, 'bytes': os.path.getsize(path)}
+        variants = write_compressed_variants(path)
+        return {'file': name, 'bytes': os.path.getsize(path),
+                'gzip_bytes': os.path.getsize(variants[0])}
+    
+    def _remove(self, name: str):
+        for path in (name, name + '.gz', name + '.br'):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(self.output_dir, path))
+    
+    def close(self, metadata: Dict) -> Dict:
+        """Write the new version if anything changed; returns the versions.json pointer"""
+        removed = [recipe_id for recipe_id in self.previous if recipe_id not in self.hashes]
+        reordered = [recipe_id for recipe_id in self.previous if recipe_id in self.hashes] != \
+            [recipe_id for recipe_id in self.hashes if recipe_id in self.previous]
+        with self.spool, self.delta_spool or contextlib.nullcontext():
+            if self.pointer['catalog'] and not (self.added or self.changed or removed or reordered):
+                self.pointer['unchanged'] = True
+                return self.pointer
+            
+            version = self.pointer['version'] + 1
+            self.spool.seek(0)
+            header = {'version': version, 'metadata': metadata, 'hashes': self.hashes}
+            catalog = self._write(f"catalog-v{version}.json", itertools.chain(
+                [json.dumps(header, ensure_ascii=False, separators=(',', ':'))[:-1], ',"recipes":['],
+                iter(lambda: self.spool.read(1 << 16), ''),
+                [']}'],
+            ))
+            hashes = self._write(f"hashes-v{version}.json", [
+                json.dumps({'version': version, 'hashes': self.hashes}, separators=(',', ':')),
+            ], compress=False)
+            
+            deltas = self.pointer['deltas']
+            if self.pointer['catalog']:
+                head = {'from': version - 1, 'to': version, 'metadata': metadata}
+                tail = {
+                    'removed': removed,
+                    'hashes': {recipe_id: self.hashes[recipe_id] for recipe_id in self.added + self.changed},
+                }
+                if reordered or self.added:
+                    tail['order'] = list(self.hashes)
+                entry = self._write(f"delta-v{version - 1}-v{version}.json", itertools.chain(
+                    [json.dumps(head, ensure_ascii=False, separators=(',', ':'))[:-1], ',"added":['],
+                    self._spooled('a'),
+                    ['],"changed":['],
+                    self._spooled('c'),
+                    ['],', json.dumps(tail, ensure_ascii=False, separators=(',', ':'))[1:]],
+                ))
+                entry.update({'from': version - 1, 'to': version, 'added': len(self.added),
+                              'changed': len(self.changed), 'removed': len(removed)})
+                deltas.append(entry)
+                self._remove(self.pointer['catalog'])
+                if self.pointer.get('hashes'):
+                    self._remove(self.pointer['hashes'])
+        for entry in deltas[:-self.keep_deltas or None]:
+            self._remove(entry['file'])
+        
+        self.pointer = {
+            'version': version,
+            'catalog': catalog['file'],
+            'catalog_bytes': catalog['bytes'],
+            'catalog_gzip_bytes': catalog['gzip_bytes'],
+            'hashes': hashes['file'],
+            'extraction_date': metadata.get('extraction_date'),
+            'deltas': deltas[-self.keep_deltas:],
+        }
+        with open(os.path.join(self.output_dir, self.POINTER), 'w', encoding='utf-8') as f:
+            json.dump(self.pointer, f, ensure_ascii=False, indent=2)
+        return self.pointer
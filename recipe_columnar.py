@@ -0,0 +1,261 @@
+"""
+Columnar Recipe Catalog
+Binary column-oriented catalog that is memory-mapped and decoded on demand
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+from recipe_model import Recipe
+
+
+COLUMNAR_MAGIC = b'RCOL'
+COLUMNAR_VERSION = 1
+_COLUMNAR_HEADER = struct.Struct('<4sIII')  # magic, version, recipe count, section count
+_COLUMNAR_SECTION = struct.Struct('<24sc3xQQ')  # name, array typecode, byte offset, item count
+_NO_STRING = 0xFFFFFFFF
+_NO_CODE = 0xFFFF
+
+
+def _little_endian(values: array) -> array:
+    if sys.byteorder != 'little' and values.itemsize > 1:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+class ColumnarWriter:
+    """Writes recipes as a columnar binary file with pooled strings and dictionary-encoded facets"""
+    
+    STRING_FIELDS = ('id', 'title', 'description', 'post_date', 'servings', 'cooking_time', 'channel')
+    LIST_FIELDS = ('ingredients', 'steps', 'images', 'similar')
+    CODED_FIELDS = ('cuisine', 'difficulty')
+    CODED_LIST_FIELDS = ('categories', 'tags')
+    
+    def __init__(self, output_file: str):
+        self.output_file = output_file
+        self.pool = bytearray()
+        self.string_offsets = array('I', [0])
+        self.string_ids = {}
+        self.recipe_ids = []
+        self.dictionaries = {field: {} for field in self.CODED_FIELDS + self.CODED_LIST_FIELDS}
+        self.columns = {field: array('I') for field in self.STRING_FIELDS}
+        self.columns['source_post_id'] = array('q')
+        for field in self.CODED_FIELDS:
+            self.columns[field] = array('H')
+        for field in self.LIST_FIELDS + self.CODED_LIST_FIELDS:
+            self.columns[field] = array('H' if field in self.CODED_LIST_FIELDS else 'I')
+            self.columns[field + '.offsets'] = array('I', [0])
+    
+    def _string(self, value: Optional[str]) -> int:
+        if value is None:
+            return _NO_STRING
+        string_id = self.string_ids.get(value)
+        if string_id is None:
+            string_id = self.string_ids[value] = len(self.string_offsets) - 1
+            self.pool += value.encode('utf-8')
+            self.string_offsets.append(len(self.pool))
+        return string_id
+    
+    def _code(self, field: str, value: Optional[str]) -> int:
+        if value is None:
+            return _NO_CODE
+        return self.dictionaries[field].setdefault(value, len(self.dictionaries[field]))
+    
+    def add(self, recipe: Recipe):
+        self.recipe_ids.append(recipe.id)
+        for field in self.STRING_FIELDS:
+            self.columns[field].append(self._string(getattr(recipe, field)))
+        self.columns['source_post_id'].append(recipe.source_post_id)
+        for field in self.CODED_FIELDS:
+            self.columns[field].append(self._code(field, getattr(recipe, field)))
+        for field in self.LIST_FIELDS + self.CODED_LIST_FIELDS:
+            values = self.columns[field]
+            if field in self.CODED_LIST_FIELDS:
+                values.extend(self._code(field, value) for value in getattr(recipe, field))
+            else:
+                values.extend(self._string(value) for value in getattr(recipe, field) or ())
+            self.columns[field + '.offsets'].append(len(values))
+    
+    def close(self, metadata: Dict) -> str:
+        """Write the file; returns its path"""
+        sections = dict(self.columns)
+        for field, codes in self.dictionaries.items():
+            sections[field + '.dict'] = array('I', (self._string(value) for value in codes))
+        # Ordinals sorted by recipe id, for lookups by binary search
+        sections['id.order'] = array('I', sorted(range(len(self.recipe_ids)), key=self.recipe_ids.__getitem__))
+        sections['metadata'] = array('I', [self._string(json.dumps(metadata, ensure_ascii=False))])
+        sections['strings.offsets'] = self.string_offsets
+        sections['strings'] = array('B', self.pool)
+        
+        offset = _COLUMNAR_HEADER.size + _COLUMNAR_SECTION.size * len(sections)
+        table = []
+        for name, values in sections.items():
+            offset += -offset % 8
+            table.append(_COLUMNAR_SECTION.pack(name.encode('ascii'), values.typecode.encode('ascii'),
+                                                offset, len(values)))
+            offset += len(values) * values.itemsize
+        
+        with open(self.output_file, 'wb') as f:
+            f.write(_COLUMNAR_HEADER.pack(COLUMNAR_MAGIC, COLUMNAR_VERSION, len(self.recipe_ids), len(sections)))
+            f.write(b''.join(table))
+            for values in sections.values():
+                f.write(b'\0' * (-f.tell() % 8))
+                f.write(_little_endian(values).tobytes())
+        return self.output_file
+
+
+class ColumnarCatalog:
+    """Read-only, memory-mapped access to a file written by ColumnarWriter.
+    
+    Example:
+        with ColumnarCatalog('recipes_extracted.cols') as catalog:
+            for ordinal in catalog.filter(category='Десерт', difficulty='Легко'):
+                print(catalog.value(ordinal, 'title'))
+            recipe = catalog.get('recipe_1234')
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = [memoryview(self._map)]
+        self._dictionaries = {}
+        
+        magic, version, count, section_count = _COLUMNAR_HEADER.unpack_from(self._map, 0)
+        if magic != COLUMNAR_MAGIC:
+            self.close()
+            raise ValueError(f"Not a columnar recipe file: {path}")
+        if version != COLUMNAR_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported columnar format version {version} in {path}")
+        self.count = count
+        
+        self.columns = {}
+        for i in range(section_count):
+            name, typecode, offset, length = _COLUMNAR_SECTION.unpack_from(
+                self._map, _COLUMNAR_HEADER.size + i * _COLUMNAR_SECTION.size)
+            typecode = typecode.decode('ascii')
+            size = array(typecode).itemsize
+            view = self._views[0][offset:offset + length * size].cast(typecode)
+            self._views.append(view)
+            if size > 1 and sys.byteorder != 'little':
+                view = array(typecode, view)
+                view.byteswap()
+            self.columns[name.rstrip(b'\0').decode('ascii')] = view
+    
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._map.close()
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def __iter__(self) -> Iterator[Recipe]:
+        return (self.recipe(ordinal) for ordinal in range(self.count))
+    
+    def string(self, string_id: int) -> Optional[str]:
+        if string_id == _NO_STRING:
+            return None
+        offsets = self.columns['strings.offsets']
+        return str(self.columns['strings'][offsets[string_id]:offsets[string_id + 1]], 'utf-8')
+    
+    def dictionary(self, field: str) -> List[str]:
+        """Values of a dictionary-encoded field, indexed by code"""
+        if field not in self._dictionaries:
+            self._dictionaries[field] = [self.string(i) for i in self.columns[field + '.dict']]
+        return self._dictionaries[field]
+    
+    @property
+    def metadata(self) -> Dict:
+        return json.loads(self.string(self.columns['metadata'][0]))
+    
+    def _span(self, field: str, ordinal: int):
+        offsets = self.columns[field + '.offsets']
+        return self.columns[field][offsets[ordinal]:offsets[ordinal + 1]]
+    
+    def value(self, ordinal: int, field: str):
+        """Decode one field of one recipe"""
+        if field in ColumnarWriter.STRING_FIELDS:
+            return self.string(self.columns[field][ordinal])
+        if field in ColumnarWriter.CODED_FIELDS:
+            code = self.columns[field][ordinal]
+            return None if code == _NO_CODE else self.dictionary(field)[code]
+        if field in ColumnarWriter.CODED_LIST_FIELDS:
+            values = self.dictionary(field)
+            return [values[code] for code in self._span(field, ordinal)]
+        if field in ColumnarWriter.LIST_FIELDS:
+            return [self.string(string_id) for string_id in self._span(field, ordinal)]
+        if field == 'source_post_id':
+            return self.columns[field][ordinal]
+        raise KeyError(field)
+    
+    def recipe(self, ordinal: int) -> Recipe:
+        if not 0 <= ordinal < self.count:
+            raise IndexError(ordinal)
+        return Recipe(**{field: self.value(ordinal, field) for field in Recipe.FIELDS})
+    
+    def ordinal(self, recipe_id: str) -> Optional[int]:
+        """Position of a recipe by id (binary search over the id order), or None"""
+        order = self.columns['id.order']
+        ids = self.columns['id']
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.string(ids[order[mid]]) < recipe_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(order) and self.string(ids[order[lo]]) == recipe_id:
+            return order[lo]
+        return None
+    
+    def get(self, recipe_id: str) -> Optional[Recipe]:
+        ordinal = self.ordinal(recipe_id)
+        return None if ordinal is None else self.recipe(ordinal)
+    
+    def _code(self, field: str, value: str) -> Optional[int]:
+        try:
+            return self.dictionary(field).index(value)
+        except ValueError:
+            return None
+    
+    def filter(self, category: Optional[str] = None, tag: Optional[str] = None,
+               cuisine: Optional[str] = None, difficulty: Optional[str] = None) -> List[int]:
+        """Ordinals of recipes matching every given value, compared as integer codes"""
+        wanted = {'categories': category, 'tags': tag, 'cuisine': cuisine, 'difficulty': difficulty}
+        codes = {}
+        for field, value in wanted.items():
+            if value is not None:
+                codes[field] = self._code(field, value)
+                if codes[field] is None:
+                    return []
+        
+        matches = []
+        for ordinal in range(self.count):
+            if all(
+                (self.columns[field][ordinal] == code if field in ColumnarWriter.CODED_FIELDS
+                 else code in self._span(field, ordinal))
+                for field, code in codes.items()
+            ):
+                matches.append(ordinal)
+        return matches
+
+
+def columnar_path(output_file: str) -> str:
+    """Default columnar catalog location for a recipes output file"""
+    return os.path.splitext(output_file)[0] + '.cols'
@@ -0,0 +1,123 @@
+"""
+Recipe Deduplication
+Near-duplicate detection for reposted and lightly edited recipes
+"""
+
+import re
+import zlib
+from typing import Iterable, List, Optional, Set
+
+from recipe_model import Recipe
+
+
+class RecipeDeduplicator:
+    """Finds near-duplicate recipes with MinHash signatures and LSH buckets.
+    
+    Clusters are the connected components of candidate pairs at or above the
+    threshold, so they do not depend on input order.
+    """
+    
+    KEEP_POLICIES = ('latest', 'complete')
+    
+    def __init__(self, threshold: float = 0.8, bands: int = 16, rows: int = 4, shingle_size: int = 3):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.bins = bands * rows
+        self.shingle_size = shingle_size
+    
+    def shingles(self, recipe: Recipe) -> Set[str]:
+        text = '\n'.join([recipe.title, *recipe.ingredients, *recipe.steps]).lower().replace('ё', 'е')
+        words = re.findall(r'\w+', text)
+        if len(words) <= self.shingle_size:
+            return {' '.join(words)} if words else set()
+        return {' '.join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+    
+    def signature(self, shingles: Iterable[str]) -> Optional[tuple]:
+        """One-permutation MinHash signature, or None for an empty shingle set"""
+        signature = [None] * self.bins
+        for shingle in shingles:
+            value = zlib.crc32(shingle.encode('utf-8'))
+            slot, value = value % self.bins, value // self.bins
+            if signature[slot] is None or value < signature[slot]:
+                signature[slot] = value
+        if all(value is None for value in signature):
+            return None
+        # Densify: an empty bin borrows the next filled bin to its right, offset by the distance
+        filled = list(signature)
+        for slot in range(self.bins):
+            distance = 1
+            while signature[slot] is None:
+                borrowed = filled[(slot + distance) % self.bins]
+                if borrowed is not None:
+                    signature[slot] = borrowed + (distance << 32)
+                distance += 1
+        return tuple(signature)
+    
+    @staticmethod
+    def similarity(first: tuple, second: tuple) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        return sum(a == b for a, b in zip(first, second)) / len(first)
+    
+    def clusters(self, recipes: List[Recipe]) -> List[List[int]]:
+        """Groups of positions in ``recipes`` that are near-duplicates of each other"""
+        signatures = [self.signature(self.shingles(recipe)) for recipe in recipes]
+        parent = list(range(len(recipes)))
+        
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        
+        buckets = {}
+        first_seen = {}
+        for i, signature in enumerate(signatures):
+            if signature is None:
+                continue
+            # Exact reposts share a signature: join them without touching the buckets
+            if signature in first_seen:
+                parent[i] = first_seen[signature]
+                continue
+            first_seen[signature] = i
+            for band in range(self.bands):
+                key = (band, signature[band * self.rows:(band + 1) * self.rows])
+                bucket = buckets.setdefault(key, [])
+                # Every candidate pair is checked unless already joined, so the
+                # clusters do not depend on the order of the recipes
+                for j in bucket:
+                    if find(i) != find(j) and self.similarity(signature, signatures[j]) >= self.threshold:
+                        parent[find(i)] = find(j)
+                bucket.append(i)
+        
+        groups = {}
+        for i in range(len(recipes)):
+            groups.setdefault(find(i), []).append(i)
+        return [group for group in groups.values() if len(group) > 1]
+    
+    @staticmethod
+    def preference(recipe: Recipe, keep: str) -> tuple:
+        """Sort key; the highest one in a cluster is kept"""
+        latest = (recipe.post_date or '', recipe.source_post_id or 0)
+        if keep == 'complete':
+            filled = sum(value is not None for value in (recipe.cooking_time, recipe.difficulty, recipe.cuisine))
+            return (len(recipe.ingredients) + len(recipe.steps), filled, len(recipe.description), *latest)
+        return latest
+    
+    def deduplicate(self, recipes: List[Recipe], keep: str = 'latest') -> tuple:
+        """Drop near-duplicates, keeping one recipe per cluster in its original position.
+        
+        ``keep`` is 'latest' (newest post) or 'complete' (most ingredients and
+        steps). Returns the remaining recipes and a mapping of kept recipe id
+        to the ids of the recipes it replaced.
+        """
+        if keep not in self.KEEP_POLICIES:
+            raise ValueError(f"Unknown keep policy: {keep}")
+        dropped = set()
+        replaced = {}
+        for group in self.clusters(recipes):
+            winner = max(group, key=lambda i: self.preference(recipes[i], keep))
+            losers = [i for i in group if i != winner]
+            dropped.update(losers)
+            replaced[recipes[winner].id] = [recipes[i].id for i in losers]
+        return [recipe for i, recipe in enumerate(recipes) if i not in dropped], replaced
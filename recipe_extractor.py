@@ -4,34 +4,738 @@ Recipe Extractor for Telegram Posts
 Extracts, categorizes, and normalizes recipes from Telegram channel JSON data
 """
 
+import argparse
+import contextlib
+import glob
+import hashlib
+import inspect
+import itertools
 import json
+import os
 import re
-from typing import Dict, List, Optional, Set
-from dataclasses import dataclass, asdict
+import shutil
+import sqlite3
+import tempfile
+import time
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional
 from datetime import datetime
+from functools import cached_property
 
+from recipe_catalog import CatalogVersionWriter, ShardWriter
+from recipe_columnar import ColumnarWriter, columnar_path
+from recipe_dedup import RecipeDeduplicator
+from recipe_facets import FacetAggregator
+from recipe_images import ThumbnailPipeline, message_photos
+from recipe_model import Recipe, pool_context
+from recipe_rankings import PopularityRanker, rankings_path
+from recipe_search_index import UNIT_PATTERN, SearchIndexBuilder, index_path
+from recipe_similar import SimilarRecipes
 
-@dataclass
-class Recipe:
-    """Unified recipe structure"""
-    id: str
-    title: str
-    description: str
-    ingredients: List[str]
-    steps: List[str]
-    categories: List[str]
-    tags: List[str]
-    source_post_id: int
-    post_date: str
-    images: List[str]
-    servings: Optional[str] = None
-    cooking_time: Optional[str] = None
-    difficulty: Optional[str] = None
-    cuisine: Optional[str] = None
+
+class _JsonStreamReader:
+    """Incremental reader that decodes JSON values from a text file chunk by chunk"""
+    
+    _decoder = json.JSONDecoder()
+    _NUMBER_CHARS = frozenset('0123456789.eE+-')
+    
+    def __init__(self, f, chunk_size: int = 1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+    
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer, dropping consumed text"""
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+    
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+    
+    def take(self) -> str:
+        """Consume and return the next non-whitespace character"""
+        char = self.peek()
+        self.pos += 1
+        return char
+    
+    def expect(self, char: str):
+        found = self.take()
+        if found != char:
+            raise ValueError(f"Malformed export: expected {char!r}, found {found!r}")
+    
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                obj, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number cut by the buffer edge ('12|34', '-0.|25', '1e|10') decodes
+            # short; it may continue in the next chunk while only number
+            # characters follow it
+            if (isinstance(obj, (int, float)) and not self.eof
+                    and all(char in self._NUMBER_CHARS for char in self.buf[end:])
+                    and self._fill()):
+                continue
+            self.pos = end
+            return obj
+
+
+def iter_export_messages(json_file_path: str, header: Dict) -> Iterator[Dict]:
+    """Yield messages of a Telegram export one at a time.
+    
+    Top-level fields other than ``messages`` (channel, channelTitle, ...) are
+    stored into ``header`` as they are encountered, so memory stays bounded by
+    the size of a single message rather than the whole export.
+    """
+    with open(json_file_path, 'r', encoding='utf-8') as f:
+        reader = _JsonStreamReader(f)
+        reader.expect('{')
+        if reader.peek() == '}':
+            return
+        while True:
+            key = reader.value()
+            reader.expect(':')
+            if key == 'messages':
+                reader.expect('[')
+                if reader.peek() == ']':
+                    reader.take()
+                else:
+                    while True:
+                        yield reader.value()
+                        separator = reader.take()
+                        if separator == ']':
+                            break
+                        if separator != ',':
+                            raise ValueError(f"Malformed export: unexpected {separator!r} in messages")
+            else:
+                header[key] = reader.value()
+            separator = reader.take()
+            if separator == '}':
+                break
+            if separator != ',':
+                raise ValueError(f"Malformed export: unexpected {separator!r} at top level")
+
+
+def _indent_json(value, level: int) -> str:
+    """Dump a value with indent=2 as if nested ``level`` levels deep"""
+    dumped = json.dumps(value, ensure_ascii=False, indent=2)
+    return dumped.replace('\n', '\n' + '  ' * level)
+
+
+_REGEX_META = set('\\.^$*+?{}[]|()')
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """Build an alternation over ``words`` shaped like a prefix trie.
+    
+    Shared prefixes are matched once and optional tails are greedy, so the
+    regex matches the longest word starting at a given position.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if '' in node else body
+    
+    return build(trie)
+
+
+class IndicatorMatcher:
+    """Finds every indicator occurring in a text in one tokenizing pass.
+    
+    Word fragments go through a prefix trie once per distinct word (memoized,
+    at most WORD_CACHE_SIZE words); patterns led by a number are tried only
+    where a digit run starts; other indicators are searched in the whole text.
+    """
+    
+    # Distinct words whose matches are remembered; a channel uses a few
+    # tens of thousands
+    WORD_CACHE_SIZE = 65536
+    
+    _WORD_RE = re.compile(r'\w+')
+    _WORD_INDICATOR_RE = re.compile(r'(\w+)(?:\\w[+*])?')
+    # A literal prefix (like "за ") followed by \d+ or (\d+)
+    _DIGIT_LED_RE = re.compile(r'([^\\.^$*+?{}\[\]|()\d]*)(?:\\d\+|\(\\d\+\))')
+    _DIGITS_RE = re.compile(r'\d+')
+    
+    def __init__(self, indicators: Iterable[str]):
+        indicators = list(dict.fromkeys(indicators))
+        self.patterns = {i: re.compile(i) for i in indicators if _REGEX_META & set(i)}
+        
+        # Indicators whose every match lies within a single word
+        word_literals = [i for i in indicators if i not in self.patterns and self._WORD_RE.fullmatch(i)]
+        word_patterns = {p: self._WORD_INDICATOR_RE.fullmatch(p).group(1) for p in self.patterns
+                         if self._WORD_INDICATOR_RE.fullmatch(p)}
+        self._text_literals = [i for i in indicators if i not in self.patterns and i not in word_literals]
+        self._text_patterns = [self.patterns[p] for p in self.patterns if p not in word_patterns]
+        
+        # A number-led pattern matching anywhere matches where its digit run starts
+        self._digit_patterns = []
+        for pattern in self._text_patterns:
+            led = self._DIGIT_LED_RE.match(pattern.pattern)
+            if led:
+                self._digit_patterns.append((led.group(1), pattern))
+        digit_led = {pattern for _, pattern in self._digit_patterns}
+        self._text_patterns = [pattern for pattern in self._text_patterns if pattern not in digit_led]
+        
+        # For each fragment: the literals it implies and the regexes worth verifying
+        fragments = set(word_literals) | set(word_patterns.values())
+        self._fragments = {}
+        for fragment in fragments:
+            heads = {fragment[:n] for n in range(1, len(fragment) + 1)}
+            self._fragments[fragment] = (
+                [word for word in word_literals if word in heads],
+                [self.patterns[p] for p, prefix in word_patterns.items() if prefix in heads],
+            )
+        self._trie = re.compile(f'(?=({_trie_regex(fragments)}))') if fragments else None
+        self._word_cache = {}
+        self._hit_words = set()  # Cached words with at least one hit
+    
+    def _scan_word(self, word: str) -> Dict[str, str]:
+        hits = {}
+        for match in self._trie.finditer(word):
+            literals, patterns = self._fragments[match.group(1)]
+            for literal in literals:
+                hits.setdefault(literal, literal)
+            for pattern in patterns:
+                if pattern.pattern not in hits:
+                    found = pattern.match(word, match.start())
+                    if found:
+                        hits[pattern.pattern] = found.group(0)
+        return hits
+    
+    def _scan_digits(self, text: str, hits: Dict[str, str]) -> int:
+        """Try the number-led patterns at each digit run, left to right; returns the runs visited"""
+        pending = self._digit_patterns
+        runs = 0
+        for run in self._DIGITS_RE.finditer(text):
+            runs += 1
+            start = run.start()
+            left = []
+            for prefix, pattern in pending:
+                begin = start - len(prefix)
+                found = begin >= 0 and text.startswith(prefix, begin) and pattern.match(text, begin)
+                if found:
+                    hits[pattern.pattern] = found.group(0)
+                else:
+                    left.append((prefix, pattern))
+            pending = left
+            if not pending:
+                break
+        return runs
+    
+    @classmethod
+    def words(cls, text: str) -> Dict[str, None]:
+        """Distinct words of ``text`` in first-seen order, as ``scan`` takes them"""
+        return dict.fromkeys(cls._WORD_RE.findall(text))
+    
+    def scan(self, text: str, metrics: Optional['ExtractionMetrics'] = None,
+             words: Optional[Dict[str, None]] = None) -> Dict[str, str]:
+        """Map each indicator found in ``text`` to the text of its leftmost match.
+        
+        ``words`` saves splitting a text that another matcher already split.
+        With ``metrics`` the word pass, the digit pass and every other
+        whole-text pattern are timed.
+        """
+        hits = {}
+        if self._trie is not None:
+            start = time.perf_counter() if metrics is not None else 0.0
+            if words is None:
+                words = self.words(text)
+            cache = self._word_cache
+            hit_words = self._hit_words
+            # Membership tests run in C; only unseen words and words with
+            # hits are visited in Python
+            misses = list(itertools.filterfalse(cache.__contains__, words))
+            for word in misses:
+                word_hits = cache[word] = self._scan_word(word)
+                if word_hits:
+                    hit_words.add(word)
+            # Last word first, so the leftmost match of each indicator wins
+            for word in reversed(list(filter(hit_words.__contains__, words))):
+                hits.update(cache[word])
+            while len(cache) > self.WORD_CACHE_SIZE:
+                word = next(iter(cache))
+                del cache[word]
+                hit_words.discard(word)
+            if metrics is not None:
+                metrics.record_words(time.perf_counter() - start, len(words), len(misses))
+        if self._digit_patterns:
+            if metrics is None:
+                self._scan_digits(text, hits)
+            else:
+                start = time.perf_counter()
+                runs = self._scan_digits(text, hits)
+                metrics.record_digits(time.perf_counter() - start, runs)
+        for literal in self._text_literals:
+            if literal in text:
+                hits[literal] = literal
+        for pattern in self._text_patterns:
+            if metrics is None:
+                found = pattern.search(text)
+            else:
+                start = time.perf_counter()
+                found = pattern.search(text)
+                metrics.record_pattern(pattern.pattern, time.perf_counter() - start, found is not None)
+            if found:
+                hits[pattern.pattern] = found.group(0)
+        return hits
+
+
+class ExtractionMetrics:
+    """Per-stage timings and indicator statistics of an extraction run, mergeable across workers"""
+    
+    STAGES = (
+        'load_data', 'scan', 'is_recipe', 'structure', 'extract_title', 'extract_description',
+        'extract_ingredients', 'extract_steps', 'categorize', 'save_recipes', 'save_sharded',
+        'deduplicate', 'find_similar', 'attach_images', 'save_columnar',
+        'save_versioned', 'save_rankings',
+    )
+    
+    def __init__(self):
+        self.stages = {}    # stage -> [seconds, calls]
+        self.patterns = {}  # pattern -> [seconds, calls, hits]
+        self.groups = {}    # indicator group -> [posts matched, indicator hits]
+        self.words = [0.0, 0, 0]  # seconds, distinct words, word cache misses
+        self.digits = [0.0, 0]  # seconds, digit runs
+        self._nested = []   # seconds spent in inner stages, per running stage
+    
+    def instrument(self, extractor: 'RecipeExtractor'):
+        """Replace the extractor's stage methods with timed wrappers"""
+        for stage in self.STAGES:
+            setattr(extractor, stage, self._timed(stage, getattr(extractor, stage)))
+    
+    def _timed(self, stage: str, func):
+        # A stage that calls another (is_recipe -> scan, save_recipes ->
+        # save_rankings) is charged only its own time, so stages add up
+        def timed(*args, **kwargs):
+            self._nested.append(0.0)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.record_stage(stage, elapsed - self._nested.pop())
+                if self._nested:
+                    self._nested[-1] += elapsed
+        return timed
+    
+    def record_stage(self, stage: str, seconds: float):
+        entry = self.stages.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+    
+    def record_pattern(self, pattern: str, seconds: float, hit: bool):
+        entry = self.patterns.setdefault(pattern, [0.0, 0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+        entry[2] += hit
+    
+    def record_words(self, seconds: float, words: int, misses: int):
+        self.words[0] += seconds
+        self.words[1] += words
+        self.words[2] += misses
+    
+    def record_digits(self, seconds: float, runs: int):
+        self.digits[0] += seconds
+        self.digits[1] += runs
+    
+    def record_groups(self, groups: Dict[str, Iterable[str]], hits: Dict[str, str]):
+        for group, indicators in groups.items():
+            matched = sum(1 for indicator in indicators if indicator in hits)
+            entry = self.groups.setdefault(group, [0, 0])
+            entry[0] += matched > 0
+            entry[1] += matched
+    
+    def take(self) -> Dict:
+        """Return the raw counters and reset them (used by worker processes)"""
+        raw = {'stages': self.stages, 'patterns': self.patterns, 'groups': self.groups,
+               'words': self.words, 'digits': self.digits}
+        self.__init__()
+        return raw
+    
+    def merge(self, raw: Dict):
+        """Add counters returned by ``take`` in another process"""
+        for name in ('stages', 'patterns', 'groups'):
+            mine = getattr(self, name)
+            for key, values in raw[name].items():
+                entry = mine.setdefault(key, [0] * len(values))
+                for i, value in enumerate(values):
+                    entry[i] += value
+        for name in ('words', 'digits'):
+            mine = getattr(self, name)
+            for i, value in enumerate(raw[name]):
+                mine[i] += value
+    
+    def report(self, seconds: float, messages: int, recipes: int, top_patterns: int = 20) -> Dict:
+        """Metrics as a JSON-serializable report"""
+        hottest = sorted(self.patterns.items(), key=lambda x: x[1][0], reverse=True)[:top_patterns]
+        return {
+            'total_seconds': round(seconds, 4),
+            'messages': messages,
+            'recipes': recipes,
+            'messages_per_sec': round(messages / seconds, 1) if seconds else None,
+            'stages': {
+                stage: {'seconds': round(entry[0], 4), 'calls': entry[1]}
+                for stage, entry in sorted(self.stages.items(), key=lambda x: x[1][0], reverse=True)
+            },
+            'indicator_groups': {
+                group: {'posts_matched': entry[0], 'indicator_hits': entry[1]}
+                for group, entry in self.groups.items()
+            },
+            'indicator_groups_note': (
+                'no time per group: each matcher finds the indicators of all its groups '
+                'in one scan; see word_pass, digit_pass and hottest_patterns'
+            ),
+            'word_pass': {
+                'seconds': round(self.words[0], 4),
+                'distinct_words': self.words[1],
+                'cache_misses': self.words[2],
+            },
+            'digit_pass': {
+                'seconds': round(self.digits[0], 4),
+                'digit_runs': self.digits[1],
+            },
+            'hottest_patterns': [
+                {'pattern': pattern, 'seconds': round(entry[0], 4), 'calls': entry[1], 'hits': entry[2]}
+                for pattern, entry in hottest
+            ],
+        }
+    
+    def save(self, metrics_file: str, seconds: float, messages: int, recipes: int):
+        with open(metrics_file, 'w', encoding='utf-8') as f:
+            json.dump(self.report(seconds, messages, recipes), f, ensure_ascii=False, indent=2)
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[List]:
+    """Group an iterable into lists of at most ``size`` items"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# Extractor living in each worker process of a parallel run
+_worker_extractor = None
+
+
+def _init_worker(extractor_class, profile: bool = False):
+    global _worker_extractor
+    _worker_extractor = extractor_class(None)
+    if profile:
+        _worker_extractor.enable_profiling()
+
+
+def _build_chunk(messages: List[Dict], method: str = 'build_recipe') -> tuple:
+    """Build recipes (or run another per-message ``method``) for a chunk; returns
+    the results with the chunk's metrics, if profiling"""
+    build = getattr(_worker_extractor, method)
+    recipes = [build(message) for message in messages]
+    metrics = _worker_extractor.metrics
+    return recipes, metrics.take() if metrics is not None else None
+
+
+def _extract_export(job: tuple) -> tuple:
+    """Extract a whole export in a worker; returns its header, message ids, recipes and metrics"""
+    extractor_class, export_file, profile = job
+    extractor = extractor_class(export_file)
+    if profile:
+        extractor.enable_profiling()
+    recipes = []
+    message_ids = []
+    for message in extractor.iter_messages():
+        message_ids.append(message.get('id'))
+        recipe = extractor.build_recipe(message)
+        if recipe is not None:
+            recipes.append(recipe)
+    metrics = extractor.metrics.take() if profile else None
+    return extractor.header, message_ids, recipes, metrics
+
+
+def is_export(path: str) -> bool:
+    """Whether a JSON file has the shape of a channel export: a top-level ``messages`` list.
+    
+    Top-level fields are read in order until ``messages`` is found, so the
+    extractor's own outputs (recipes, indexes, manifests, metrics) are told
+    apart without loading a whole export.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            reader = _JsonStreamReader(f)
+            reader.expect('{')
+            while reader.peek() != '}':
+                key = reader.value()
+                reader.expect(':')
+                if key == 'messages':
+                    return reader.peek() == '['
+                reader.value()
+                if reader.take() != ',':
+                    break
+    except (OSError, ValueError):
+        return False
+    return False
+
+
+def expand_exports(source: str) -> List[str]:
+    """Export files named by a file path, a directory (its *.json files) or a glob pattern.
+    
+    Files found through a directory or pattern are kept only if they look like
+    exports (see is_export), so outputs written next to the exports, such as
+    recipes_extracted.json or versions.json, are not taken for channels.
+    """
+    if os.path.isfile(source):
+        return [source]
+    if os.path.isdir(source):
+        source = os.path.join(source, '*.json')
+    return sorted(path for path in glob.glob(source) if os.path.isfile(path) and is_export(path))
+
+
+class PostStructure:
+    """Linear-time structural pre-parse of a post (line kinds, numbered items, sentences), shared by the extract_* methods"""
+    
+    _BULLET_RE = re.compile(r'^\s*[•\-*]\s*')
+    _NUMBER_RE = re.compile(r'\d+[\.)]')
+    _SPACE_RE = re.compile(r'\s*')
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.lower = text.lower()
+        self.lines = text.split('\n')
+        self.lower_lines = self.lower.split('\n')
+        self.kinds = []
+        self.bullets = {}  # line index -> text after the bullet marker
+        for index, line in enumerate(self.lines):
+            stripped = line.strip()
+            bullet = self._BULLET_RE.match(line)
+            if not stripped:
+                kind = 'blank'
+            elif bullet:
+                kind = 'bullet'
+                self.bullets[index] = line[bullet.end():].strip()
+            elif self._NUMBER_RE.match(stripped):
+                kind = 'numbered'
+            elif stripped.endswith(':') and len(stripped) < 60:
+                kind = 'header'
+            else:
+                kind = 'paragraph'
+            self.kinds.append(kind)
+    
+    @cached_property
+    def title_lines(self) -> List[str]:
+        """First five lines, stripped, starting at the first non-blank line"""
+        start = next((i for i, kind in enumerate(self.kinds) if kind != 'blank'), len(self.lines))
+        return [line.strip() for line in self.lines[start:start + 5]]
+    
+    @cached_property
+    def sentences(self) -> List[str]:
+        return re.split(r'[.!?]\s+', self.text)
+    
+    @cached_property
+    def numbered_items(self) -> List[str]:
+        """Text of numbered items ("1. ...", "2) ...") in order.
+        
+        An item starts at the beginning of the text or of a line, after any
+        whitespace (blank lines included); its text starts at the first
+        non-space character after the marker and runs to the end of that line.
+        """
+        text = self.text
+        items = []
+        candidate = 0
+        skipped_to = -1
+        while candidate < len(text):
+            # Candidates inside an already skipped whitespace run give the same result
+            if candidate >= skipped_to:
+                start = self._SPACE_RE.match(text, candidate).end()
+                skipped_to = start
+                marker = self._NUMBER_RE.match(text, start)
+                if marker:
+                    body = self._SPACE_RE.match(text, marker.end()).end()
+                    if body == len(text):
+                        break
+                    end = text.find('\n', body + 1)
+                    if end == -1:
+                        end = len(text)
+                    items.append(text[body:end].strip())
+                    candidate = end
+                    continue
+            candidate = text.find('\n', candidate + 1)
+            if candidate == -1:
+                break
+        return items
+    
+    def section(self, header: 're.Pattern', terminators: Iterable[str]) -> Optional[str]:
+        """Lowercased text after the first ``header`` match up to the nearest terminator.
+        
+        The section ends at the first terminator string found after the header,
+        or at the end of the text (before a final newline). Returns None when
+        the header does not occur.
+        """
+        match = header.search(self.lower)
+        if not match:
+            return None
+        start = match.end()
+        end = len(self.lower)
+        if self.lower.endswith('\n') and end - 1 >= start:
+            end -= 1
+        for terminator in terminators:
+            found = self.lower.find(terminator, start, end + len(terminator) - 1)
+            if found != -1:
+                end = found
+        return self.lower[start:end]
+
+
+class ExtractionState:
+    """On-disk record of processed messages for incremental extraction.
+    
+    Keyed to a fingerprint of the extractor code and wiped when that changes.
+    """
+    
+    def __init__(self, path: str, fingerprint: str):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS messages ('
+            'id INTEGER PRIMARY KEY, edit_date TEXT, content_hash TEXT NOT NULL, recipe TEXT)'
+        )
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        if row is None or row[0] != fingerprint:
+            self.conn.execute('DELETE FROM messages')
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('fingerprint', ?)", (fingerprint,))
+        self.conn.commit()
+    
+    @staticmethod
+    def content_hash(message: Dict) -> str:
+        """Hash of the message fields that recipe extraction depends on"""
+        content = json.dumps([message.get('text', ''), message.get('date', '')], ensure_ascii=False)
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+    
+    def load(self) -> Dict[int, tuple]:
+        """Return {message id: (edit_date, content_hash, recipe_json)}"""
+        rows = self.conn.execute('SELECT id, edit_date, content_hash, recipe FROM messages')
+        return {row[0]: row[1:] for row in rows}
+    
+    def update(self, rows: Iterable[tuple], removed_ids: Iterable[int]):
+        """Upsert (id, edit_date, content_hash, recipe_json) rows and drop removed ids"""
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?)', rows)
+            self.conn.executemany('DELETE FROM messages WHERE id = ?', ((i,) for i in removed_ids))
+    
+    def close(self):
+        self.conn.close()
+
+
+class LazyRecipe:
+    """Handle for a recipe post whose fields are extracted on first access; ``materialize`` gives the Recipe"""
+    
+    FIELDS = Recipe.FIELDS
+    
+    def __init__(self, extractor: 'RecipeExtractor', message: Dict, hits: Dict[str, str]):
+        self.extractor = extractor
+        self.message = message
+        self.hits = hits
+        self.source_post_id = message.get('id')
+        self.id = f"recipe_{self.source_post_id}"
+        self.post_date = message.get('date', '')
+        self.images = []
+        self.photos = message_photos(message)
+        self.servings = None
+        self.channel = None
+        self.similar = None
+        self.views = message.get('views')
+        self.forwards = message.get('forwards')
+        self.edit_date = message.get('editDate')
+    
+    @property
+    def text(self) -> str:
+        return self.message.get('text', '')
+    
+    @cached_property
+    def post(self) -> PostStructure:
+        return self.extractor.structure(self.text)
+    
+    @cached_property
+    def title(self) -> str:
+        return self.extractor.extract_title(self.text, self.source_post_id, self.post)
+    
+    @cached_property
+    def description(self) -> str:
+        return self.extractor.extract_description(self.text, self.title, self.post)
+    
+    @cached_property
+    def ingredients(self) -> List[str]:
+        return self.extractor.extract_ingredients(self.text, self.post)
+    
+    @cached_property
+    def steps(self) -> List[str]:
+        return self.extractor.extract_steps(self.text, self.post) or ["См. полное описание рецепта"]
+    
+    @cached_property
+    def categorization(self) -> Dict:
+        return self.extractor.categorize(self.text, self.hits)
+    
+    @cached_property
+    def categories(self) -> tuple:
+        return tuple(self.categorization['categories'])
+    
+    @cached_property
+    def tags(self) -> tuple:
+        return tuple(self.categorization['tags'])
+    
+    @cached_property
+    def cooking_time(self) -> Optional[str]:
+        return self.categorization['cooking_time']
+    
+    @cached_property
+    def difficulty(self) -> Optional[str]:
+        return self.categorization['difficulty']
+    
+    @cached_property
+    def cuisine(self) -> Optional[str]:
+        return self.categorization['cuisine']
+    
+    def materialize(self) -> Recipe:
+        """The fully extracted Recipe"""
+        return Recipe(**{field: getattr(self, field) for field in self.FIELDS + Recipe.SOURCE_FIELDS})
     
     def to_dict(self):
-        """Convert to dictionary, excluding None values"""
-        return {k: v for k, v in asdict(self).items() if v is not None}
+        return self.materialize().to_dict()
+    
+    def __reduce__(self):
+        # The extractor stays in this process; send the extracted recipe
+        return self.materialize().__reduce__()
+    
+    def __repr__(self):
+        return f"{type(self).__name__}(id={self.id!r})"
 
 
 class RecipeExtractor:
@@ -66,7 +770,7 @@ class RecipeExtractor:
         r'тесто',
         
         # Measurements
-        r'\d+\s*(г|гр|грамм|кг|мл|л|ст\.?\s*л|ч\.?\s*л|столов\w+\s+лож\w+|чайн\w+\s+лож\w+)',
+        r'\d+\s*' + UNIT_PATTERN,
         
         # Temperature
         r'\d+\s*°[CF]',
@@ -135,12 +839,111 @@ class RecipeExtractor:
         'Низкокалорийное': ['легк', 'низкокалорийн', 'диетическ'],
     }
     
+    # Season indicators
+    SEASON_INDICATORS = {
+        'зимнее': ['зим'],
+        'летнее': ['лет'],
+        'осеннее': ['осен'],
+        'весеннее': ['весен'],
+    }
+    
+    # Occasion indicators
+    OCCASION_INDICATORS = {
+        'для гостей': ['праздн', 'гост', 'званый ужин', 'вечеринк'],
+        'домашняя кухня': ['домашн'],
+    }
+    
+    # Cooking time mention, e.g. "40 минут", "2 часа"
+    TIME_PATTERN = r'(\d+)\s*(?:минут|мин\.?|час)'
+    
+    # Oven temperature, matched against the original (not lowercased) text
+    TEMPERATURE_RE = re.compile(r'\d+\s*°[CF]')
+    
+    # Emojis removed from titles
+    EMOJI_RE = re.compile(r'[🍝🥘🍳🥗🍲🍕🍖🥩🥙🌮🍱🍜🍛🥟🍢🥠🥡🧆🥚🥓🥞🧇🥐🍞🥖🥨🧀🥗🥙]')
+    
+    # Ingredient section headers (tried in order) and the words that end a section
+    INGREDIENT_HEADERS = (
+        re.compile(r'ингредиент[ыа]?\s*:?\s*'),
+        re.compile(r'состав\s*:?\s*'),
+        re.compile(r'нам понадобится\s*:?\s*'),
+    )
+    INGREDIENT_SECTION_END = ('приготовление', 'способ', 'инструкц', 'шаг', '\n\n')
+    
+    # Instruction section headers; the section runs to the end of the post
+    INSTRUCTION_HEADERS = (
+        re.compile(r'приготовление\s*:?\s*'),
+        re.compile(r'способ приготовления\s*:?\s*'),
+        re.compile(r'инструкция\s*:?\s*'),
+    )
+    
+    # Amounts like "200 г", "2 ст.л"; inline mentions look like "мука — 200 г"
+    MEASUREMENT_RE = re.compile(r'\d+\s*(г|гр|грамм|кг|мл|л|ст\.?\s*л|ч\.?\s*л)')
+    INGREDIENT_NAME_RE = re.compile(r'[а-яА-Яa-zA-Z\s]+')
+    INLINE_AMOUNT_RE = re.compile(r'\s*(\d+\s*(?:г|гр|грамм|кг|мл|л|ст\.?\s*л|ч\.?\s*л))')
+    
+    # Messages handed to a worker process at a time in parallel runs
+    CHUNK_SIZE = 64
+    
+    # Minimum seconds between progress lines
+    PROGRESS_INTERVAL = 2.0
+    
     def __init__(self, json_file_path: str):
         """Initialize with path to JSON file"""
         self.json_file_path = json_file_path
         self.data = None
+        self.header = {}  # Top-level export fields seen while streaming
         self.recipes = []
+        self.message_count = 0
+        self.metrics = None  # ExtractionMetrics when profiling is enabled
+        self.channels = []  # Per-export metadata of a merged batch run
+        self._scanned = None  # Last scanned text, lowercased and split into words
         
+    @classmethod
+    def matchers(cls) -> tuple:
+        """Matchers over the recipe indicators and over the categorization
+        indicators of this class, compiled once"""
+        matchers = cls.__dict__.get('_matchers')
+        if matchers is None:
+            indicators = [cls.TIME_PATTERN]
+            for table in (cls.CUISINE_INDICATORS, cls.DISH_TYPE_INDICATORS, cls.COOKING_METHOD_INDICATORS,
+                          cls.DIFFICULTY_INDICATORS, cls.DIET_INDICATORS, cls.SEASON_INDICATORS,
+                          cls.OCCASION_INDICATORS):
+                for keywords in table.values():
+                    indicators.extend(keywords)
+            matchers = (IndicatorMatcher(cls.RECIPE_INDICATORS), IndicatorMatcher(indicators))
+            cls._matchers = matchers
+        return matchers
+    
+    def scan(self, text: str, matchers: Optional[Iterable[IndicatorMatcher]] = None) -> Dict[str, str]:
+        """Find the indicators of ``matchers`` (default: all) in the lowercased text"""
+        # Consecutive scans of one post are split into words once
+        if self._scanned is None or self._scanned[0] is not text:
+            lowered = text.lower()
+            self._scanned = (text, lowered, IndicatorMatcher.words(lowered))
+        _, lowered, words = self._scanned
+        hits = {}
+        for matcher in matchers or self.matchers():
+            hits.update(matcher.scan(lowered, self.metrics, words))
+        return hits
+    
+    def enable_profiling(self) -> ExtractionMetrics:
+        """Start recording per-stage and per-indicator metrics for this extractor"""
+        if self.metrics is None:
+            self.metrics = ExtractionMetrics()
+            self.metrics.instrument(self)
+        return self.metrics
+    
+    def indicator_groups(self) -> Dict[str, List[str]]:
+        """Indicator strings per group, as reported in profiling metrics"""
+        groups = {'recipe': list(self.RECIPE_INDICATORS), 'time': [self.TIME_PATTERN]}
+        for group, table in (('cuisine', self.CUISINE_INDICATORS), ('dish_type', self.DISH_TYPE_INDICATORS),
+                             ('cooking_method', self.COOKING_METHOD_INDICATORS),
+                             ('difficulty', self.DIFFICULTY_INDICATORS), ('diet', self.DIET_INDICATORS),
+                             ('season', self.SEASON_INDICATORS), ('occasion', self.OCCASION_INDICATORS)):
+            groups[group] = [keyword for keywords in table.values() for keyword in keywords]
+        return groups
+    
     def load_data(self):
         """Load JSON data from file"""
         print(f"Loading data from {self.json_file_path}...")
@@ -148,118 +951,119 @@ class RecipeExtractor:
             self.data = json.load(f)
         print(f"Loaded {len(self.data.get('messages', []))} messages")
         
-    def is_recipe(self, text: str) -> bool:
+    def is_recipe(self, text: str, hits: Optional[Dict[str, str]] = None) -> bool:
         """Determine if a post contains a recipe"""
         if not text or len(text) < 100:  # Too short to be a recipe
             return False
-            
-        # Count how many recipe indicators are present
-        indicator_count = 0
-        text_lower = text.lower()
         
-        for pattern in self.RECIPE_INDICATORS:
-            if re.search(pattern, text_lower):
-                indicator_count += 1
+        if hits is None:
+            hits = self.scan(text)
+        
+        # Count how many recipe indicators are present
+        indicator_count = sum(1 for pattern in self.RECIPE_INDICATORS if pattern in hits)
                 
         # Need at least 3 indicators to be considered a recipe
         return indicator_count >= 3
     
-    def extract_title(self, text: str, post_id: int) -> str:
+    def structure(self, text: str) -> PostStructure:
+        """Pre-parse a post once for all extract_* methods"""
+        return PostStructure(text)
+    
+    def extract_title(self, text: str, post_id: int, post: Optional[PostStructure] = None) -> str:
         """Extract or generate recipe title"""
-        lines = text.strip().split('\n')
+        post = post or self.structure(text)
         
         # Check first few lines for a title
-        for line in lines[:5]:
-            line = line.strip()
+        for line in post.title_lines:
             # Title is usually short, capitalized, and not too long
             if line and len(line) < 100 and not line.startswith('•') and not line.startswith('-'):
                 # Remove emojis and clean up
-                cleaned = re.sub(r'[🍝🥘🍳🥗🍲🍕🍖🥩🥙🌮🍱🍜🍛🥟🍢🥠🥡🧆🥚🥓🥞🧇🥐🍞🥖🥨🧀🥗🥙]', '', line)
+                cleaned = self.EMOJI_RE.sub('', line)
                 cleaned = cleaned.strip('.,!?:;')
                 if cleaned:
                     return cleaned
         
         # If no clear title found, use first sentence
-        first_sentence = re.split(r'[.!?]', text)[0].strip()
+        first_sentence = re.split(r'[.!?]', text, maxsplit=1)[0].strip()
         if first_sentence and len(first_sentence) < 100:
-            cleaned = re.sub(r'[🍝🥘🍳🥗🍲🍕🍖🥩🥙🌮🍱🍜🍛🥟🍢🥠🥡🧆🥚🥓🥞🧇🥐🍞🥖🥨🧀🥗🥙]', '', first_sentence)
+            cleaned = self.EMOJI_RE.sub('', first_sentence)
             return cleaned.strip()
             
         return f"Рецепт #{post_id}"
     
-    def extract_ingredients(self, text: str) -> List[str]:
+    def extract_ingredients(self, text: str, post: Optional[PostStructure] = None) -> List[str]:
         """Extract ingredients list from text"""
+        post = post or self.structure(text)
         ingredients = []
-        text_lower = text.lower()
         
         # Look for ingredient sections
-        ingredient_section_patterns = [
-            r'ингредиент[ыа]?\s*:?\s*(.*?)(?=приготовление|способ|инструкц|шаг|\n\n|$)',
-            r'состав\s*:?\s*(.*?)(?=приготовление|способ|инструкц|шаг|\n\n|$)',
-            r'нам понадобится\s*:?\s*(.*?)(?=приготовление|способ|инструкц|шаг|\n\n|$)',
-        ]
-        
         ingredient_text = ""
-        for pattern in ingredient_section_patterns:
-            match = re.search(pattern, text_lower, re.DOTALL)
-            if match:
-                ingredient_text = match.group(1)
+        for header in self.INGREDIENT_HEADERS:
+            section = post.section(header, self.INGREDIENT_SECTION_END)
+            if section is not None:
+                ingredient_text = section
                 break
         
         # If no explicit section found, extract lines with measurements
         if not ingredient_text:
-            lines = text.split('\n')
-            for line in lines:
+            for index, line in enumerate(post.lines):
                 # Look for lines with measurements
-                if re.search(r'\d+\s*(г|гр|грамм|кг|мл|л|ст\.?\s*л|ч\.?\s*л)', line.lower()):
+                if self.MEASUREMENT_RE.search(post.lower_lines[index]):
                     ingredients.append(line.strip())
                 # Look for bulleted lists
-                elif re.match(r'^\s*[•\-*]\s*', line):
-                    clean_line = re.sub(r'^\s*[•\-*]\s*', '', line).strip()
+                elif index in post.bullets:
+                    clean_line = post.bullets[index]
                     if clean_line and len(clean_line) < 200:
                         ingredients.append(clean_line)
         else:
             # Parse ingredient section
             for line in ingredient_text.split('\n'):
-                clean_line = re.sub(r'^\s*[•\-*]\s*', '', line).strip()
+                clean_line = PostStructure._BULLET_RE.sub('', line, count=1).strip()
                 if clean_line and len(clean_line) < 200:
                     ingredients.append(clean_line)
         
         # Also extract inline ingredient mentions with measurements
-        measurement_pattern = r'([а-яА-Яa-zA-Z\s]+)\s*[—–-]\s*(\d+\s*(?:г|гр|грамм|кг|мл|л|ст\.?\s*л|ч\.?\s*л))'
-        for match in re.finditer(measurement_pattern, text):
-            ingredient = f"{match.group(1).strip()} — {match.group(2).strip()}"
-            if ingredient not in ingredients:
+        seen = set(ingredients)
+        for ingredient in self.inline_measurements(text):
+            if ingredient not in seen:
+                seen.add(ingredient)
                 ingredients.append(ingredient)
         
         return ingredients[:30]  # Limit to reasonable number
     
-    def extract_steps(self, text: str) -> List[str]:
+    def inline_measurements(self, text: str) -> Iterator[str]:
+        """Yield "name — amount" for every "name - 200 г" mention in the text.
+        
+        Each run of letters is tried once as a name, so the scan stays linear
+        even for long texts without any amount.
+        """
+        pos = 0
+        while True:
+            name = self.INGREDIENT_NAME_RE.search(text, pos)
+            if not name:
+                return
+            pos = name.end()
+            if pos < len(text) and text[pos] in '—–-':
+                amount = self.INLINE_AMOUNT_RE.match(text, pos + 1)
+                if amount:
+                    yield f"{name.group().strip()} — {amount.group(1).strip()}"
+                    pos = amount.end()
+                    continue
+            pos += 1
+    
+    def extract_steps(self, text: str, post: Optional[PostStructure] = None) -> List[str]:
         """Extract cooking steps from text"""
-        steps = []
+        post = post or self.structure(text)
         
         # Look for numbered steps
-        numbered_pattern = r'(?:^|\n)\s*\d+[\.)]\s*(.+?)(?=\n\s*\d+[\.)]|\n\n|$)'
-        numbered_matches = re.finditer(numbered_pattern, text, re.MULTILINE | re.DOTALL)
-        
-        for match in numbered_matches:
-            step = match.group(1).strip()
-            if step and len(step) > 20:  # Minimum length for a step
-                steps.append(step)
+        steps = [step for step in post.numbered_items if len(step) > 20]  # Minimum length for a step
         
         # If no numbered steps, look for paragraph-based instructions
         if not steps:
             # Look for instruction section
-            instruction_patterns = [
-                r'приготовление\s*:?\s*(.*?)$',
-                r'способ приготовления\s*:?\s*(.*?)$',
-                r'инструкция\s*:?\s*(.*?)$',
-            ]
-            
-            for pattern in instruction_patterns:
-                match = re.search(pattern, text.lower(), re.DOTALL)
-                if match:
-                    instruction_text = match.group(1)
+            for header in self.INSTRUCTION_HEADERS:
+                instruction_text = post.section(header, ())
+                if instruction_text is not None:
                     # Split by periods or line breaks
                     sentences = re.split(r'[.]\s+(?=[А-ЯA-Z])', instruction_text)
                     for sentence in sentences:
@@ -281,13 +1085,13 @@ class RecipeExtractor:
         
         return steps[:20]  # Limit to reasonable number
     
-    def extract_description(self, text: str, title: str) -> str:
+    def extract_description(self, text: str, title: str, post: Optional[PostStructure] = None) -> str:
         """Extract recipe description"""
-        # Get first few sentences that don't look like ingredients or steps
-        sentences = re.split(r'[.!?]\s+', text)
+        post = post or self.structure(text)
         
+        # Get first few sentences that don't look like ingredients or steps
         description_parts = []
-        for sentence in sentences[:5]:
+        for sentence in post.sentences[:5]:
             sentence = sentence.strip()
             # Skip if it looks like a title, ingredient, or step
             if (sentence and len(sentence) > 30 and len(sentence) < 500 
@@ -300,9 +1104,10 @@ class RecipeExtractor:
         
         return '. '.join(description_parts) if description_parts else title
     
-    def categorize(self, text: str) -> Dict[str, any]:
+    def categorize(self, text: str, hits: Optional[Dict[str, str]] = None) -> Dict[str, any]:
         """Categorize recipe by cuisine, dish type, cooking method, etc."""
-        text_lower = text.lower()
+        if hits is None:
+            hits = self.scan(text)
         
         categories = []
         tags = []
@@ -311,130 +1116,413 @@ class RecipeExtractor:
         
         # Detect cuisine
         for cuisine_name, keywords in self.CUISINE_INDICATORS.items():
-            if any(keyword in text_lower for keyword in keywords):
+            if any(keyword in hits for keyword in keywords):
                 cuisine = cuisine_name
                 tags.append(cuisine_name.lower())
                 break
         
         # Detect dish type
         for dish_type, keywords in self.DISH_TYPE_INDICATORS.items():
-            if any(keyword in text_lower for keyword in keywords):
+            if any(keyword in hits for keyword in keywords):
                 categories.append(dish_type)
                 tags.append(dish_type.lower())
         
         # Detect cooking method
         for method, keywords in self.COOKING_METHOD_INDICATORS.items():
-            if any(keyword in text_lower for keyword in keywords):
+            if any(keyword in hits for keyword in keywords):
                 tags.append(method.lower())
         
         # Detect difficulty
         for diff_level, keywords in self.DIFFICULTY_INDICATORS.items():
-            if any(re.search(keyword, text_lower) for keyword in keywords):
+            if any(keyword in hits for keyword in keywords):
                 difficulty = diff_level
                 tags.append(diff_level.lower())
                 break
         
         # Detect diet type
         for diet_type, keywords in self.DIET_INDICATORS.items():
-            if any(keyword in text_lower for keyword in keywords):
+            if any(keyword in hits for keyword in keywords):
                 tags.append(diet_type.lower())
         
         # Extract time mentions
-        time_match = re.search(r'(\d+)\s*(?:минут|мин\.?|час)', text_lower)
-        cooking_time = None
-        if time_match:
-            cooking_time = time_match.group(0)
-            tags.append('быстрое приготовление' if int(time_match.group(1)) <= 30 else 'длительное приготовление')
+        cooking_time = hits.get(self.TIME_PATTERN)
+        if cooking_time:
+            minutes = int(re.match(r'\d+', cooking_time).group(0))
+            tags.append('быстрое приготовление' if minutes <= 30 else 'длительное приготовление')
         
         # Temperature detection for oven-baked dishes
-        if re.search(r'\d+\s*°[CF]', text) or 'духовк' in text_lower:
+        if 'духовк' in hits or self.TEMPERATURE_RE.search(text):
             tags.append('запеченное')
         
         # Season detection
-        season_keywords = {
-            'зимнее': ['зим'],
-            'летнее': ['лет'],
-            'осеннее': ['осен'],
-            'весеннее': ['весен'],
-        }
-        for season, keywords in season_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
+        for season, keywords in self.SEASON_INDICATORS.items():
+            if any(keyword in hits for keyword in keywords):
                 tags.append(season)
         
         # Special occasions
-        if any(word in text_lower for word in ['праздн', 'гост', 'званый ужин', 'вечеринк']):
-            tags.append('для гостей')
-        
-        if 'домашн' in text_lower:
-            tags.append('домашняя кухня')
+        for occasion, keywords in self.OCCASION_INDICATORS.items():
+            if any(keyword in hits for keyword in keywords):
+                tags.append(occasion)
         
         return {
-            'categories': list(set(categories)) or ['Основное блюдо'],
-            'tags': list(set(tags)),
+            # First-seen order, so output does not depend on the string hash seed
+            'categories': list(dict.fromkeys(categories)) or ['Основное блюдо'],
+            'tags': list(dict.fromkeys(tags)),
             'cuisine': cuisine,
             'difficulty': difficulty,
             'cooking_time': cooking_time,
         }
     
-    def extract_recipes(self):
-        """Main method to extract all recipes"""
+    def iter_messages(self) -> Iterator[Dict]:
+        """Yield export messages, streaming them from disk unless already loaded"""
+        if self.data:
+            yield from self.data.get('messages', [])
+        else:
+            yield from iter_export_messages(self.json_file_path, self.header)
+    
+    def classify_message(self, message: Dict) -> Optional[Dict[str, str]]:
+        """Indicator hits of a recipe message, or None if it is not a recipe"""
+        text = message.get('text', '')
+        if not text or len(text) < 100:
+            return None
+        
+        # Most posts are not recipes: categorization indicators are only
+        # looked for once the recipe indicators pass
+        recipe_matcher, category_matcher = self.matchers()
+        hits = self.scan(text, (recipe_matcher,))
+        recipe = self.is_recipe(text, hits)
+        if recipe:
+            hits.update(self.scan(text, (category_matcher,)))
+        if self.metrics is not None:
+            self.metrics.record_groups(self.indicator_groups(), hits)
+        return hits if recipe else None
+    
+    def classify(self, message: Dict) -> Optional[Dict]:
+        """Id and categories of a recipe message, without extracting its text fields"""
+        hits = self.classify_message(message)
+        if hits is None:
+            return None
+        post_id = message.get('id')
+        return {
+            'id': f"recipe_{post_id}",
+            'source_post_id': post_id,
+            'categories': self.categorize(message.get('text', ''), hits)['categories'],
+        }
+    
+    def lazy_recipe(self, message: Dict) -> Optional[LazyRecipe]:
+        """A LazyRecipe for a recipe message, or None if it is not a recipe"""
+        hits = self.classify_message(message)
+        return None if hits is None else LazyRecipe(self, message, hits)
+    
+    def build_recipe(self, message: Dict) -> Optional[Recipe]:
+        """Build a Recipe from a single message, or None if it is not a recipe"""
+        hits = self.classify_message(message)
+        if hits is None:
+            return None
+        
+        text = message['text']
+        post_id = message.get('id')
+        
+        # Extract basic info from one shared pre-parse
+        post = self.structure(text)
+        title = self.extract_title(text, post_id, post)
+        description = self.extract_description(text, title, post)
+        ingredients = self.extract_ingredients(text, post)
+        steps = self.extract_steps(text, post)
+        
+        # Categorize
+        categorization = self.categorize(text, hits)
+        
+        return Recipe(
+            id=f"recipe_{post_id}",
+            title=title,
+            description=description,
+            ingredients=ingredients,
+            steps=steps if steps else ["См. полное описание рецепта"],
+            categories=categorization['categories'],
+            tags=categorization['tags'],
+            source_post_id=post_id,
+            post_date=message.get('date', ''),
+            images=[],  # Thumbnails of the photos, filled in by attach_images
+            cooking_time=categorization['cooking_time'],
+            difficulty=categorization['difficulty'],
+            cuisine=categorization['cuisine'],
+            views=message.get('views'),
+            forwards=message.get('forwards'),
+            edit_date=message.get('editDate'),
+            photos=message_photos(message),
+        )
+    
+    def _build_parallel(self, messages: Iterable[Dict], workers: int,
+                        method: str = 'build_recipe') -> Iterator[Optional[Recipe]]:
+        """Run build_recipe (or ``method``) over a process pool, yielding results in message order.
+        
+        Messages are sent in chunks and only a few chunks per worker are in
+        flight at once, so streaming input stays bounded in memory.
+        """
+        profile = self.metrics is not None
+        with pool_context().Pool(workers, initializer=_init_worker, initargs=(type(self), profile)) as pool:
+            pending = deque()
+            for chunk in _chunked(messages, self.CHUNK_SIZE):
+                pending.append(pool.apply_async(_build_chunk, (chunk, method)))
+                if len(pending) >= workers * 4:
+                    yield from self._collect_chunk(pending.popleft().get())
+            while pending:
+                yield from self._collect_chunk(pending.popleft().get())
+    
+    def _collect_chunk(self, result: tuple) -> List[Optional[Recipe]]:
+        recipes, metrics = result
+        if metrics is not None:
+            self.metrics.merge(metrics)
+        return recipes
+    
+    def iter_built(self, messages: Iterable[Dict], workers: int = 1,
+                   method: str = 'build_recipe') -> Iterator[Optional[Recipe]]:
+        """Run build_recipe (or another per-message ``method``) over messages, in
+        order, optionally in parallel"""
+        if workers > 1 and method == 'lazy_recipe':
+            # Handles refer back to this extractor: classify in the pool, wrap here
+            messages, pending = itertools.tee(messages)
+            hits = self._build_parallel(pending, workers, 'classify_message')
+            return (None if found is None else LazyRecipe(self, message, found)
+                    for message, found in zip(messages, hits))
+        if workers > 1:
+            return self._build_parallel(messages, workers, method)
+        return map(getattr(self, method), messages)
+    
+    def iter_recipes(self, messages: Iterable[Dict], workers: int = 1,
+                     method: str = 'build_recipe') -> Iterator[Recipe]:
+        """Lazily turn a stream of messages into a stream of recipes.
+        
+        With ``workers > 1`` messages are processed by a pool of that many
+        processes; recipes still come out in the original post order.
+        ``method`` may name ``classify`` to yield classification records instead.
+        """
+        recipe_count = 0
+        self.message_count = 0
+        last_progress = time.monotonic()
+        for recipe in self.iter_built(messages, workers, method):
+            self.message_count += 1
+            if recipe is not None:
+                recipe_count += 1
+                yield recipe
+            # Throttled progress instead of a line per recipe
+            now = time.monotonic()
+            if now - last_progress >= self.PROGRESS_INTERVAL:
+                last_progress = now
+                print(f"Processed {self.message_count} messages, found {recipe_count} recipes...")
+    
+    def extract_recipes(self, workers: int = 1, lazy: bool = False):
+        """Main method to extract all recipes.
+        
+        With ``lazy`` posts are only classified here (by ``workers``
+        processes) and the recipes are LazyRecipe handles that extract each
+        field on first access, in this process.
+        """
         if not self.data:
             self.load_data()
         
         messages = self.data.get('messages', [])
-        recipe_count = 0
         
         print("\nAnalyzing posts for recipes...")
-        for message in messages:
-            text = message.get('text', '')
-            
-            if self.is_recipe(text):
-                recipe_count += 1
-                post_id = message.get('id')
-                
-                print(f"Processing recipe #{recipe_count} from post {post_id}...")
-                
-                # Extract basic info
-                title = self.extract_title(text, post_id)
-                description = self.extract_description(text, title)
-                ingredients = self.extract_ingredients(text)
-                steps = self.extract_steps(text)
-                
-                # Categorize
-                categorization = self.categorize(text)
-                
-                # Create recipe object
-                recipe = Recipe(
-                    id=f"recipe_{post_id}",
-                    title=title,
-                    description=description,
-                    ingredients=ingredients,
-                    steps=steps if steps else ["См. полное описание рецепта"],
-                    categories=categorization['categories'],
-                    tags=categorization['tags'],
-                    source_post_id=post_id,
-                    post_date=message.get('date', ''),
-                    images=[],  # Image URLs would need to be extracted separately
-                    cooking_time=categorization['cooking_time'],
-                    difficulty=categorization['difficulty'],
-                    cuisine=categorization['cuisine'],
-                )
-                
-                self.recipes.append(recipe)
+        if lazy:
+            self.recipes.extend(self.iter_recipes(messages, workers, method='lazy_recipe'))
+        else:
+            self.recipes.extend(self.iter_recipes(messages, workers))
         
         print(f"\n✓ Extracted {len(self.recipes)} recipes from {len(messages)} messages")
         return self.recipes
     
-    def save_recipes(self, output_file: str):
-        """Save recipes to JSON file"""
-        output_data = {
-            'metadata': {
-                'source_channel': self.data.get('channel'),
-                'source_channel_title': self.data.get('channelTitle'),
+    def classify_recipes(self, workers: int = 1) -> List[Dict]:
+        """Ids and categories of all recipe posts, skipping text extraction (see classify)"""
+        if not self.data:
+            self.load_data()
+        
+        messages = self.data.get('messages', [])
+        records = list(self.iter_recipes(messages, workers, method='classify'))
+        print(f"\n✓ Classified {len(records)} recipe posts among {len(messages)} messages")
+        return records
+    
+    def extract_batch(self, export_files: List[str], workers: int = 1):
+        """Extract several channel exports into one merged catalog.
+        
+        Each export is streamed and extracted as a whole by one of ``workers``
+        processes, so at most ``workers`` exports are being read at a time and
+        only their recipes are kept. Recipes are merged in the order of
+        ``export_files``; ids become ``recipe_<channel>_<post id>`` and carry
+        the channel, so they are unique across channels. A post present in
+        several exports of the same channel is kept once, from the last export,
+        and ``self.channels`` has one entry per channel: its source files, the
+        largest ``totalMessages`` among them, and messages are counted once.
+        """
+        jobs = [(type(self), export_file, self.metrics is not None) for export_file in export_files]
+        merged = {}
+        print(f"\nExtracting {len(jobs)} exports with {min(workers, len(jobs))} workers...")
+        with contextlib.ExitStack() as stack:
+            if workers > 1 and len(jobs) > 1:
+                pool = stack.enter_context(pool_context().Pool(min(workers, len(jobs))))
+                results = pool.imap(_extract_export, jobs)
+            else:
+                results = map(_extract_export, jobs)
+            
+            channels = {}
+            seen = {}  # Message ids per channel; exports of one channel overlap
+            for export_file, (header, message_ids, recipes, metrics) in zip(export_files, results):
+                if metrics is not None:
+                    self.metrics.merge(metrics)
+                channel = header.get('channel') or os.path.splitext(os.path.basename(export_file))[0]
+                export_dir = os.path.dirname(os.path.abspath(export_file))
+                for recipe in recipes:
+                    recipe.id = f"recipe_{channel}_{recipe.source_post_id}"
+                    recipe.channel = channel
+                    recipe.photos = [os.path.join(export_dir, path) for path in recipe.photos]
+                    merged[recipe.id] = recipe
+                seen.setdefault(channel, set()).update(message_ids)
+                entry = channels.setdefault(channel, {
+                    'channel': channel,
+                    'channel_title': None,
+                    'source_files': [],
+                    'original_total_messages': None,
+                })
+                entry['channel_title'] = header.get('channelTitle') or entry['channel_title']
+                entry['source_files'].append(os.path.basename(export_file))
+                if header.get('totalMessages') is not None:
+                    entry['original_total_messages'] = max(entry['original_total_messages'] or 0,
+                                                           header['totalMessages'])
+                print(f"✓ {channel} ({os.path.basename(export_file)}): {len(recipes)} recipes "
+                      f"from {len(message_ids)} messages")
+        
+        self.channels = list(channels.values())
+        self.message_count = sum(len(ids) for ids in seen.values())
+        self.recipes = list(merged.values())
+        print(f"\n✓ Extracted {len(self.recipes)} recipes from {self.message_count} messages "
+              f"in {len(export_files)} exports of {len(self.channels)} channels")
+        return self.recipes
+    
+    def _fingerprint(self) -> str:
+        """Hash of the source that stored results depend on, used to invalidate incremental state"""
+        digest = hashlib.sha1()
+        for source in dict.fromkeys(map(inspect.getsourcefile, (type(self), Recipe, message_photos))):
+            with open(source, 'rb') as f:
+                digest.update(f.read())
+        return digest.hexdigest()
+    
+    def extract_incremental(self, state_path: str, workers: int = 1) -> Dict[str, int]:
+        """Extract recipes, re-running extraction only for new or edited messages.
+        
+        Messages are streamed from the export and compared with ``state_path``
+        by id, ``editDate`` and content hash; unchanged ones reuse the stored
+        result. ``self.recipes`` ends up exactly as a full extraction would
+        leave it. Returns counts of new, edited, unchanged and removed messages.
+        """
+        state = ExtractionState(state_path, self._fingerprint())
+        try:
+            known = state.load()
+            stats = {'new': 0, 'edited': 0, 'unchanged': 0, 'removed': 0}
+            order = []
+            changed = []
+            engagement = {}
+            
+            print("\nComparing posts with previous extraction...")
+            for message in self.iter_messages():
+                post_id = message.get('id')
+                order.append(post_id)
+                engagement[post_id] = (message.get('views'), message.get('forwards'), message.get('editDate'),
+                                       message_photos(message))
+                row = known.get(post_id)
+                content_hash = state.content_hash(message)
+                if row is not None and row[0] == message.get('editDate') and row[1] == content_hash:
+                    stats['unchanged'] += 1
+                    continue
+                stats['new' if row is None else 'edited'] += 1
+                changed.append((message, content_hash))
+            
+            rows = []
+            built = self.iter_built((message for message, _ in changed), workers)
+            for (message, content_hash), recipe in zip(changed, built):
+                recipe_json = json.dumps(recipe.to_dict(), ensure_ascii=False) if recipe else None
+                row = (message.get('id'), message.get('editDate'), content_hash, recipe_json)
+                known[row[0]] = row[1:]
+                rows.append(row)
+            
+            seen = set(order)
+            removed = [post_id for post_id in known if post_id not in seen]
+            stats['removed'] = len(removed)
+            state.update(rows, removed)
+        finally:
+            state.close()
+        
+        self.recipes = []
+        for post_id in order:
+            if known[post_id][2]:
+                # Source fields are not stored; views change without the post being edited
+                views, forwards, edit_date, photos = engagement[post_id]
+                self.recipes.append(Recipe.from_dict(dict(json.loads(known[post_id][2]), views=views,
+                                                          forwards=forwards, edit_date=edit_date,
+                                                          photos=photos)))
+        self.message_count = len(order)
+        print(f"✓ {stats['new']} new, {stats['edited']} edited, {stats['unchanged']} unchanged, "
+              f"{stats['removed']} removed messages")
+        print(f"\n✓ Extracted {len(self.recipes)} recipes from {len(order)} messages")
+        return stats
+    
+    def deduplicate(self, keep: str = 'latest', threshold: float = 0.8) -> Dict[str, List[str]]:
+        """Drop near-duplicate recipes (reposts, light edits), see RecipeDeduplicator.
+        
+        Returns a mapping of each kept recipe id to the ids it replaced.
+        """
+        before = len(self.recipes)
+        self.recipes, replaced = RecipeDeduplicator(threshold).deduplicate(self.recipes, keep)
+        print(f"✓ Removed {before - len(self.recipes)} near-duplicate recipes "
+              f"in {len(replaced)} clusters (kept {keep})")
+        return replaced
+    
+    def attach_images(self, output_dir: str, workers: int = 1, **options):
+        """Set each recipe's ``images`` to thumbnails of its photos (see ThumbnailPipeline).
+        
+        Photo paths are resolved against the export's directory; ``options``
+        are passed to ThumbnailPipeline. Without this stage ``images`` stays
+        empty, since raw export paths are not URLs the app can load.
+        """
+        base_dir = os.path.dirname(os.path.abspath(self.json_file_path))
+        pipeline = ThumbnailPipeline(output_dir, **options)
+        sources = {recipe.id: [os.path.join(base_dir, path) for path in recipe.photos] for recipe in self.recipes}
+        names = pipeline.run((path for paths in sources.values() for path in paths), workers)
+        for recipe in self.recipes:
+            recipe.images = [pipeline.url(names[path]) for path in sources[recipe.id] if names[path]]
+    
+    def find_similar(self, k: int = 5):
+        """Store the ids of the ``k`` most similar recipes in each recipe's ``similar`` (see SimilarRecipes)"""
+        methods = (method.lower() for method in self.COOKING_METHOD_INDICATORS)
+        neighbours = SimilarRecipes(k, methods).neighbours(self.recipes)
+        for recipe, positions in zip(self.recipes, neighbours):
+            recipe.similar = [self.recipes[position].id for position in positions] or None
+        print(f"✓ Computed up to {k} similar recipes for {len(self.recipes)} recipes")
+    
+    def _metadata(self, total_recipes: int) -> Dict:
+        if self.channels:
+            counts = self._channel_counts()
+            return {
+                'channels': [dict(entry, total_recipes=counts.get(entry['channel'], 0))
+                             for entry in self.channels],
                 'extraction_date': datetime.now().isoformat(),
-                'total_recipes': len(self.recipes),
-                'original_total_messages': self.data.get('totalMessages'),
-            },
+                'total_recipes': total_recipes,
+                'original_total_messages': sum(entry['original_total_messages'] or 0
+                                               for entry in self.channels),
+            }
+        source = self.data or self.header
+        return {
+            'source_channel': source.get('channel'),
+            'source_channel_title': source.get('channelTitle'),
+            'extraction_date': datetime.now().isoformat(),
+            'total_recipes': total_recipes,
+            'original_total_messages': source.get('totalMessages'),
+        }
+    
+    def save_recipes(self, output_file: str, index_file: Optional[str] = None):
+        """Save recipes to JSON file, plus the search index and popularity rankings next to it"""
+        output_data = {
+            'metadata': self._metadata(len(self.recipes)),
             'recipes': [recipe.to_dict() for recipe in self.recipes]
         }
         
@@ -442,72 +1530,341 @@ class RecipeExtractor:
             json.dump(output_data, f, ensure_ascii=False, indent=2)
         
         print(f"\n✓ Saved {len(self.recipes)} recipes to {output_file}")
-    
-    def generate_summary(self) -> Dict:
-        """Generate summary statistics"""
-        if not self.recipes:
-            return {}
         
-        # Count categories
-        category_counts = {}
+        index = SearchIndexBuilder()
         for recipe in self.recipes:
-            for category in recipe.categories:
-                category_counts[category] = category_counts.get(category, 0) + 1
-        
-        # Count cuisines
-        cuisine_counts = {}
+            index.add(recipe)
+        index_file = index_file or index_path(output_file)
+        index.save(index_file)
+        print(f"✓ Saved search index to {index_file}")
+        self.save_rankings(rankings_path(output_file))
+    
+    def save_rankings(self, rankings_file: str):
+        """Save popularity scores and ranked recipe lists (see PopularityRanker)"""
+        ranker = PopularityRanker()
         for recipe in self.recipes:
-            if recipe.cuisine:
-                cuisine_counts[recipe.cuisine] = cuisine_counts.get(recipe.cuisine, 0) + 1
-        
-        # Count tags
-        tag_counts = {}
+            ranker.add(recipe)
+        ranker.save(rankings_file)
+        print(f"✓ Saved popularity rankings to {rankings_file}")
+    
+    def save_sharded(self, output_dir: str, shard_size: int = 50):
+        """Save recipes as a listing manifest plus content-hashed shards (see ShardWriter)"""
+        writer = ShardWriter(output_dir, shard_size)
         for recipe in self.recipes:
-            for tag in recipe.tags:
-                tag_counts[tag] = tag_counts.get(tag, 0) + 1
-        
-        # Count difficulty levels
-        difficulty_counts = {}
+            writer.add(recipe)
+        manifest_file = writer.close(self._metadata(len(self.recipes)))
+        print(f"✓ Saved {len(writer.shards)} recipe shards and {manifest_file}")
+    
+    def save_columnar(self, output_file: str):
+        """Save recipes in the compact columnar format (see ColumnarWriter)"""
+        writer = ColumnarWriter(output_file)
+        for recipe in self.recipes:
+            writer.add(recipe)
+        writer.close(self._metadata(len(self.recipes)))
+        print(f"✓ Saved columnar catalog to {output_file}")
+    
+    def save_versioned(self, output_dir: str) -> Dict:
+        """Save a versioned catalog and a delta against the previous version (see CatalogVersionWriter)"""
+        writer = CatalogVersionWriter(output_dir)
         for recipe in self.recipes:
-            if recipe.difficulty:
-                difficulty_counts[recipe.difficulty] = difficulty_counts.get(recipe.difficulty, 0) + 1
+            writer.add(recipe)
+        pointer = writer.close(self._metadata(len(self.recipes)))
+        self._report_version(pointer)
+        return pointer
+    
+    @staticmethod
+    def _report_version(pointer: Dict):
+        if pointer.get('unchanged'):
+            print(f"✓ Catalog unchanged at version {pointer['version']}")
+        elif pointer['deltas'] and pointer['deltas'][-1]['to'] == pointer['version']:
+            delta = pointer['deltas'][-1]
+            print(f"✓ Saved catalog version {pointer['version']}: {delta['added']} added, "
+                  f"{delta['changed']} changed, {delta['removed']} removed "
+                  f"({delta['gzip_bytes']} bytes gzipped vs {pointer['catalog_gzip_bytes']} for the catalog)")
+        else:
+            print(f"✓ Saved catalog version {pointer['version']}")
+    
+    def stream_recipes(self, output_file: str, output_format: str = 'json', workers: int = 1,
+                       shard_dir: Optional[str] = None, shard_size: int = 50,
+                       columnar_file: Optional[str] = None, version_dir: Optional[str] = None,
+                       facets_file: Optional[str] = None) -> Dict:
+        """Extract and write recipes incrementally without holding them in memory.
         
-        return {
-            'total_recipes': len(self.recipes),
-            'categories': dict(sorted(category_counts.items(), key=lambda x: x[1], reverse=True)),
-            'cuisines': dict(sorted(cuisine_counts.items(), key=lambda x: x[1], reverse=True)),
-            'top_tags': dict(sorted(tag_counts.items(), key=lambda x: x[1], reverse=True)[:20]),
-            'difficulty_distribution': difficulty_counts,
-        }
+        ``output_format`` is 'json' (the layout of ``save_recipes``) or 'jsonl'.
+        The search index and rankings are written alongside, plus whichever of
+        the sharded, columnar, versioned and facet outputs are requested.
+        Returns the summary statistics.
+        """
+        if output_format not in ('json', 'jsonl'):
+            raise ValueError(f"Unknown output format: {output_format}")
+        
+        counter = FacetAggregator()
+        index = SearchIndexBuilder()
+        ranker = PopularityRanker()
+        sinks = [counter, index, ranker]
+        if shard_dir:
+            shards = ShardWriter(shard_dir, shard_size)
+            sinks.append(shards)
+        if columnar_file:
+            columnar = ColumnarWriter(columnar_file)
+            sinks.append(columnar)
+        if version_dir:
+            versions = CatalogVersionWriter(version_dir)
+            sinks.append(versions)
+        output_dir = os.path.dirname(os.path.abspath(output_file))
+        
+        print("\nStreaming posts for recipes...")
+        if output_format == 'jsonl':
+            with open(output_file, 'w', encoding='utf-8') as f:
+                for recipe in self.iter_recipes(self.iter_messages(), workers):
+                    for sink in sinks:
+                        sink.add(recipe)
+                    f.write(json.dumps(recipe.to_dict(), ensure_ascii=False))
+                    f.write('\n')
+        else:
+            with tempfile.TemporaryFile('w+', encoding='utf-8', dir=output_dir) as spool:
+                written = 0
+                for recipe in self.iter_recipes(self.iter_messages(), workers):
+                    if written:
+                        spool.write(',')
+                    spool.write('\n    ' + _indent_json(recipe.to_dict(), 2))
+                    written += 1
+                    for sink in sinks:
+                        sink.add(recipe)
+                
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    f.write('{\n  "metadata": ' + _indent_json(self._metadata(counter.total), 1))
+                    if written:
+                        f.write(',\n  "recipes": [')
+                        spool.seek(0)
+                        shutil.copyfileobj(spool, f)
+                        f.write('\n  ]\n}')
+                    else:
+                        f.write(',\n  "recipes": []\n}')
+        
+        print(f"\n✓ Extracted {counter.total} recipes from {self.message_count} messages")
+        print(f"✓ Saved {counter.total} recipes to {output_file}")
+        index.save(index_path(output_file))
+        print(f"✓ Saved search index to {index_path(output_file)}")
+        ranker.save(rankings_path(output_file))
+        print(f"✓ Saved popularity rankings to {rankings_path(output_file)}")
+        if shard_dir:
+            manifest_file = shards.close(self._metadata(counter.total))
+            print(f"✓ Saved {len(shards.shards)} recipe shards and {manifest_file}")
+        if columnar_file:
+            columnar.close(self._metadata(counter.total))
+            print(f"✓ Saved columnar catalog to {columnar_file}")
+        if version_dir:
+            self._report_version(versions.close(self._metadata(counter.total)))
+        if facets_file:
+            counter.save(facets_file)
+            print(f"✓ Saved facet counts to {facets_file}")
+        return counter.to_summary()
+    
+    def _channel_counts(self) -> Dict[str, int]:
+        counts = {}
+        for recipe in self.recipes:
+            counts[recipe.channel] = counts.get(recipe.channel, 0) + 1
+        return counts
+    
+    def aggregate(self) -> FacetAggregator:
+        """Facet counts over all recipes, in one pass (see FacetAggregator)"""
+        aggregator = FacetAggregator()
+        for recipe in self.recipes:
+            aggregator.add(recipe)
+        return aggregator
+    
+    def generate_summary(self, aggregator: Optional[FacetAggregator] = None) -> Dict:
+        """Generate summary statistics, with recipes per channel for merged catalogs"""
+        aggregator = aggregator or self.aggregate()
+        summary = aggregator.to_summary()
+        if self.channels and summary:
+            summary['channels'] = aggregator.ranked('channel')
+        return summary
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Extract recipes from a Telegram channel export")
+    parser.add_argument('input_file', nargs='?',
+                        default=os.path.join(base_dir, 'kerzmaneat_1763203806174.json'),
+                        help="Telegram channel export (JSON), or a directory or glob pattern of "
+                             "exports to merge into one catalog")
+    parser.add_argument('-o', '--output', default=None,
+                        help="Where to write extracted recipes (default: recipes_extracted.json, "
+                             "or recipes_classified.json with --classify)")
+    parser.add_argument('-s', '--summary', default=os.path.join(base_dir, 'extraction_summary.json'),
+                        help="Where to write summary statistics")
+    parser.add_argument('--stream', action='store_true',
+                        help="Parse messages one at a time and write recipes incrementally")
+    parser.add_argument('--format', choices=['json', 'jsonl'], default='json',
+                        help="Output format for --stream mode (default: json)")
+    parser.add_argument('-j', '--workers', type=int, default=1, metavar='N',
+                        help="Extract with N worker processes (0 = one per CPU core, default: 1)")
+    parser.add_argument('--shard-dir', default=None, metavar='DIR',
+                        help="Also write a listing manifest plus content-hashed recipe shards to DIR")
+    parser.add_argument('--shard-size', type=int, default=50, metavar='N',
+                        help="Recipes per shard file (default: 50)")
+    parser.add_argument('--columnar', nargs='?', metavar='FILE', const='',
+                        help="Also write the compact columnar catalog (default: <output>.cols)")
+    parser.add_argument('--versions', metavar='DIR',
+                        help="Also write a versioned catalog with per-recipe hashes and a delta "
+                             "against the previous version to DIR")
+    parser.add_argument('--dedup', nargs='?', choices=RecipeDeduplicator.KEEP_POLICIES, const='latest',
+                        help="Drop near-duplicate recipes, keeping the latest (default) or most complete "
+                             "version of each; not available with --stream")
+    parser.add_argument('--similar', nargs='?', type=int, const=5, metavar='K',
+                        help="Add the ids of the K most similar recipes to each recipe (default K: 5); "
+                             "not available with --stream")
+    parser.add_argument('--images', metavar='DIR',
+                        help="Make thumbnails of attached photos in DIR and list them in 'images' "
+                             "(needs Pillow and an export with its media folder)")
+    parser.add_argument('--thumb-size', type=int, default=480, metavar='PX',
+                        help="Longest thumbnail side in pixels (default: 480)")
+    parser.add_argument('--thumb-format', choices=['webp', 'jpeg'], default='webp',
+                        help="Thumbnail format (default: webp)")
+    audit = parser.add_mutually_exclusive_group()
+    audit.add_argument('--summary-only', action='store_true',
+                       help="Only write the summary; recipe fields are extracted lazily, so "
+                            "text fields no statistic needs are never parsed")
+    audit.add_argument('--classify', action='store_true',
+                       help="Only classify posts: write recipe ids and categories to the output file")
+    parser.add_argument('--facets', nargs='?', metavar='FILE',
+                        const=os.path.join(base_dir, 'extraction_facets.json'),
+                        help="Write flat and cross-tabulated facet counts (cuisine x category, tag x month, "
+                             "difficulty x cooking time, ...) as JSON (default: extraction_facets.json)")
+    parser.add_argument('--profile', nargs='?', metavar='FILE',
+                        const=os.path.join(base_dir, 'extraction_metrics.json'),
+                        help="Record per-stage and per-indicator metrics and write them as JSON "
+                             "(default: extraction_metrics.json)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only re-extract messages that are new or edited since the last run")
+    parser.add_argument('--state', default=None,
+                        help="State database for --incremental (default: <output>.state.db)")
+    args = parser.parse_args(argv)
+    if args.dedup and args.stream:
+        parser.error("--dedup needs all recipes at once and cannot be combined with --stream")
+    if args.similar and args.stream:
+        parser.error("--similar needs all recipes at once and cannot be combined with --stream")
+    if args.images and args.stream:
+        parser.error("--images cannot be combined with --stream")
+    if (args.summary_only or args.classify) and (args.stream or args.shard_dir or args.versions
+                                                 or args.columnar is not None):
+        parser.error("--summary-only and --classify write no catalog; drop --stream, --shard-dir, "
+                     "--columnar and --versions")
+    args.exports = expand_exports(args.input_file)
+    if not args.exports:
+        parser.error(f"No exports found at {args.input_file}")
+    args.batch = os.path.isdir(args.input_file) or args.exports != [args.input_file]
+    if args.batch and (args.stream or args.incremental or args.summary_only or args.classify):
+        parser.error("--stream, --incremental, --summary-only and --classify take a single export, "
+                     "not a directory or pattern")
+    if args.incremental and (args.summary_only or args.classify):
+        parser.error("--incremental cannot be combined with --summary-only or --classify")
+    if args.classify and (args.dedup or args.similar or args.images or args.facets):
+        parser.error("--classify only writes classification records; drop --dedup, --similar, "
+                     "--images and --facets")
+    if args.output is None:
+        # Never let a quick audit overwrite the recipe catalog
+        args.output = os.path.join(base_dir, 'recipes_classified.json' if args.classify
+                                   else 'recipes_extracted.json')
+    return args
 
 
-def main():
+def main(argv=None):
     """Main execution function"""
+    args = parse_args(argv)
+    
     print("=" * 70)
     print("RECIPE EXTRACTOR FOR TELEGRAM POSTS")
     print("=" * 70)
     
     # File paths
-    input_file = '/Users/adragin/Downloads/cursor/kkitchen/kerzmaneat_1763203806174.json'
-    output_file = '/Users/adragin/Downloads/cursor/kkitchen/recipes_extracted.json'
-    summary_file = '/Users/adragin/Downloads/cursor/kkitchen/extraction_summary.json'
+    input_file = args.input_file
+    output_file = args.output
+    summary_file = args.summary
+    
+    workers = args.workers or os.cpu_count() or 1
+    columnar_file = None
+    if args.columnar is not None:
+        columnar_file = args.columnar or columnar_path(output_file)
     
     # Create extractor
     extractor = RecipeExtractor(input_file)
+    if args.profile:
+        extractor.enable_profiling()
+    started = time.perf_counter()
     
-    # Extract recipes
-    recipes = extractor.extract_recipes()
+    if args.classify:
+        records = extractor.classify_recipes(workers)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump({'metadata': extractor._metadata(len(records)), 'recipes': records},
+                      f, ensure_ascii=False, indent=2)
+        print(f"✓ Saved {len(records)} classified posts to {output_file}")
+        
+        counts = {}
+        for record in records:
+            for category in record['categories']:
+                counts[category] = counts.get(category, 0) + 1
+        print("\n📊 Categories Distribution:")
+        for category, count in sorted(counts.items(), key=lambda x: x[1], reverse=True)[:10]:
+            print(f"  • {category}: {count}")
+        
+        if args.profile:
+            extractor.metrics.save(args.profile, time.perf_counter() - started,
+                                   extractor.message_count, len(records))
+            print(f"✓ Saved extraction metrics to {args.profile}")
+        return
     
-    # Save recipes
-    extractor.save_recipes(output_file)
+    if args.stream:
+        summary = extractor.stream_recipes(output_file, args.format, workers, args.shard_dir, args.shard_size,
+                                         columnar_file, args.versions, args.facets)
+    else:
+        if args.batch:
+            extractor.extract_batch(args.exports, workers)
+        elif args.incremental:
+            state_file = args.state or os.path.splitext(output_file)[0] + '.state.db'
+            extractor.extract_incremental(state_file, workers)
+        else:
+            # Extract recipes
+            extractor.extract_recipes(workers, lazy=args.summary_only)
+        
+        if args.dedup:
+            extractor.deduplicate(args.dedup)
+        if args.similar:
+            extractor.find_similar(args.similar)
+        if args.images:
+            extractor.attach_images(args.images, workers, max_size=args.thumb_size,
+                                    image_format=args.thumb_format)
+        
+        # Save recipes
+        if not args.summary_only:
+            extractor.save_recipes(output_file)
+        if args.shard_dir:
+            extractor.save_sharded(args.shard_dir, args.shard_size)
+        if columnar_file:
+            extractor.save_columnar(columnar_file)
+        if args.versions:
+            extractor.save_versioned(args.versions)
+        
+        # Generate summary
+        aggregator = extractor.aggregate()
+        summary = extractor.generate_summary(aggregator)
+        if args.facets:
+            aggregator.save(args.facets)
+            print(f"✓ Saved facet counts to {args.facets}")
     
-    # Generate and save summary
-    summary = extractor.generate_summary()
+    # Save summary
     with open(summary_file, 'w', encoding='utf-8') as f:
         json.dump(summary, f, ensure_ascii=False, indent=2)
     
     print(f"\n✓ Saved extraction summary to {summary_file}")
     
+    if args.profile:
+        extractor.metrics.save(args.profile, time.perf_counter() - started,
+                               extractor.message_count, summary.get('total_recipes', 0))
+        print(f"✓ Saved extraction metrics to {args.profile}")
+    
     # Print summary
     print("\n" + "=" * 70)
     print("EXTRACTION SUMMARY")
@@ -526,6 +1883,11 @@ def main():
     for tag, count in list(summary['top_tags'].items())[:15]:
         print(f"  • {tag}: {count}")
     
+    if summary.get('channels'):
+        print("\n📺 Recipes per Channel:")
+        for channel, count in summary['channels'].items():
+            print(f"  • {channel}: {count}")
+    
     if summary['difficulty_distribution']:
         print("\n⭐ Difficulty Distribution:")
         for difficulty, count in summary['difficulty_distribution'].items():
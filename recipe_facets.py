@@ -0,0 +1,131 @@
+"""
+Recipe Facets
+Facet counts and cross-tabulations of extracted recipes
+"""
+
+import json
+from typing import Dict, Iterable, Optional
+
+from recipe_model import Recipe, cooking_minutes
+
+
+def cooking_time_bucket(cooking_time: Optional[str]) -> Optional[str]:
+    """Bucket of a cooking time such as "20 минут" or "1 час", for facet counts"""
+    minutes = cooking_minutes(cooking_time)
+    if minutes is None:
+        return None
+    for limit, label in FacetAggregator.TIME_BUCKETS:
+        if limit is None or minutes <= limit:
+            return label
+
+
+class FacetAggregator:
+    """Flat and cross-tabulated facet counts, kept up to date as recipes come and go.
+    
+    Rows are kept by (channel, recipe id): adding a recipe again replaces it
+    and ``remove`` subtracts it. Zero counts keep their place, so orderings
+    do not shift after removals.
+    """
+    
+    TIME_BUCKETS = ((15, '≤15 мин'), (30, '16–30 мин'), (60, '31–60 мин'), (None, '>60 мин'))
+    DIMENSIONS = {
+        'category': lambda recipe: recipe.categories,
+        'cuisine': lambda recipe: [recipe.cuisine] if recipe.cuisine else [],
+        'difficulty': lambda recipe: [recipe.difficulty] if recipe.difficulty else [],
+        'tag': lambda recipe: recipe.tags,
+        'channel': lambda recipe: [recipe.channel] if recipe.channel else [],
+        'month': lambda recipe: [recipe.post_date[:7]] if recipe.post_date else [],
+        'cooking_time': lambda recipe: [bucket] if (bucket := cooking_time_bucket(recipe.cooking_time)) else [],
+    }
+    FACETS = (
+        ('category',), ('cuisine',), ('difficulty',), ('tag',), ('channel',), ('month',), ('cooking_time',),
+        ('cuisine', 'category'), ('tag', 'month'), ('difficulty', 'cooking_time'), ('channel', 'category'),
+    )
+    
+    def __init__(self, facets: Iterable[tuple] = FACETS):
+        self.facets = [tuple(facet) for facet in facets]
+        self.dimensions = sorted({dimension for facet in self.facets for dimension in facet},
+                                 key=list(self.DIMENSIONS).index)
+        self.positions = [[self.dimensions.index(dimension) for dimension in facet] for facet in self.facets]
+        self.values = []
+        self.codes = {}
+        self.rows = {}
+        self.counts = [{} for _ in self.facets]
+    
+    @property
+    def total(self) -> int:
+        return len(self.rows)
+    
+    def _code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+    
+    def _update(self, row: tuple, delta: int):
+        for positions, counts in zip(self.positions, self.counts):
+            keys = [()]
+            for position in positions:
+                keys = [key + (code,) for key in keys for code in row[position]]
+            for key in keys:
+                counts[key] = counts.get(key, 0) + delta
+    
+    def add(self, recipe: Recipe):
+        """Count a recipe; one already counted with the same channel and id is replaced"""
+        self.remove(recipe.id, recipe.channel)
+        row = tuple(tuple(self._code(value) for value in self.DIMENSIONS[dimension](recipe))
+                    for dimension in self.dimensions)
+        self.rows[recipe.channel, recipe.id] = row
+        self._update(row, 1)
+    
+    def remove(self, recipe_id: str, channel: Optional[str] = None):
+        row = self.rows.pop((channel, recipe_id), None)
+        if row is not None:
+            self._update(row, -1)
+    
+    def counts_of(self, *facet: str) -> Dict[tuple, int]:
+        """Non-zero counts of one facet keyed by value tuples, in first-seen order"""
+        counts = self.counts[self.facets.index(facet)]
+        return {tuple(self.values[code] for code in key): count for key, count in counts.items() if count}
+    
+    def ranked(self, dimension: str) -> Dict[str, int]:
+        """Counts of a single-dimension facet, most frequent first"""
+        counts = {key[0]: count for key, count in self.counts_of(dimension).items()}
+        return dict(sorted(counts.items(), key=lambda x: x[1], reverse=True))
+    
+    def to_summary(self) -> Dict:
+        """Totals per category, cuisine, tag (top 20) and difficulty, as in extraction_summary.json"""
+        if not self.total:
+            return {}
+        return {
+            'total_recipes': self.total,
+            'categories': self.ranked('category'),
+            'cuisines': self.ranked('cuisine'),
+            'top_tags': dict(list(self.ranked('tag').items())[:20]),
+            'difficulty_distribution': {key[0]: count for key, count in self.counts_of('difficulty').items()},
+        }
+    
+    def to_facets(self) -> Dict:
+        """Every facet as nested counts, e.g. ``{"cuisine_by_category": {cuisine: {category: n}}}``"""
+        buckets = {label: i for i, (_, label) in enumerate(self.TIME_BUCKETS)}  # Buckets in time order
+        facets = {}
+        for facet in self.facets:
+            counts = self.counts_of(*facet)
+            if len(facet) == 1:
+                facets[facet[0]] = dict(sorted(((key[0], count) for key, count in counts.items()),
+                                               key=lambda x: (-x[1], x[0])))
+                continue
+            nested = {}
+            for key, count in sorted(counts.items(), key=lambda item: [(buckets.get(v, 0), v) for v in item[0]]):
+                level = nested
+                for value in key[:-1]:
+                    level = level.setdefault(value, {})
+                level[key[-1]] = count
+            facets['_by_'.join(facet)] = nested
+        return {'total_recipes': self.total, 'time_buckets': [label for _, label in self.TIME_BUCKETS],
+                'facets': facets}
+    
+    def save(self, facets_file: str):
+        with open(facets_file, 'w', encoding='utf-8') as f:
+            json.dump(self.to_facets(), f, ensure_ascii=False, indent=2)
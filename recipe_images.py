@@ -0,0 +1,146 @@
+"""
+Recipe Images
+Thumbnails of the photos attached to recipe posts
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, Iterable, List, Optional
+
+from recipe_model import pool_context
+
+
+def message_photos(message: Dict) -> List[str]:
+    """Photos attached to a message, as paths relative to a Telegram Desktop export.
+    
+    Desktop exports reference photos as ``"photo": "photos/photo_1@...jpg"``
+    and images sent as files through ``"file"`` with an ``image/*`` mime type.
+    Media that was not downloaded ("(File not included. ...)") is skipped.
+    """
+    candidates = [message.get('photo')]
+    if str(message.get('mime_type', '')).startswith('image/'):
+        candidates.append(message.get('file'))
+    return [path for path in candidates
+            if isinstance(path, str) and path and not path.startswith('(File not included')]
+
+
+def _make_thumbnail(job: tuple) -> tuple:
+    """Write one thumbnail in a worker; returns (source, file name or None, error or None)"""
+    source, output_dir, max_size, image_format, quality = job
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return source, None, "Pillow is not installed (pip install Pillow)"
+    
+    try:
+        with open(source, 'rb') as f:
+            content = f.read()
+        params = f"{max_size}:{image_format}:{quality}".encode('ascii')
+        name = hashlib.sha256(params + content).hexdigest()[:20] + ('.webp' if image_format == 'webp' else '.jpg')
+        target = os.path.join(output_dir, name)
+        if os.path.exists(target):
+            return source, name, None
+        
+        # A private temporary name: two workers may render identical photos at once
+        fd, partial = tempfile.mkstemp(suffix='.part', dir=output_dir)
+        os.close(fd)
+        try:
+            with Image.open(source) as image:
+                image = ImageOps.exif_transpose(image).convert('RGB')
+                image.thumbnail((max_size, max_size))
+                if image_format == 'webp':
+                    image.save(partial, 'WEBP', quality=quality, method=4)
+                else:
+                    image.save(partial, 'JPEG', quality=quality, optimize=True, progressive=True)
+            os.chmod(partial, 0o644)  # mkstemp files are private to the owner
+            try:
+                os.replace(partial, target)
+            except OSError:
+                # The other worker's copy of the same content won the race
+                if not os.path.exists(target):
+                    raise
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(partial)
+        return source, name, None
+    except (OSError, Image.DecompressionBombError) as e:
+        # DecompressionBombError is not an OSError; skip the photo rather than fail the pool
+        return source, None, str(e)
+
+
+class ThumbnailPipeline:
+    """Resized thumbnails of recipe photos, named after their content and settings.
+    
+    A manifest of source size and mtime lets re-runs skip processed photos.
+    """
+    
+    MANIFEST = 'thumbnails.json'
+    
+    def __init__(self, output_dir: str, max_size: int = 480, image_format: str = 'webp',
+                 quality: int = 75, prefix: Optional[str] = None):
+        if image_format not in ('webp', 'jpeg'):
+            raise ValueError(f"Unknown thumbnail format: {image_format}")
+        self.output_dir = output_dir
+        self.max_size = max_size
+        self.image_format = image_format
+        self.quality = quality
+        self.prefix = os.path.basename(os.path.normpath(output_dir)) if prefix is None else prefix
+        self.settings = [max_size, image_format, quality]
+        os.makedirs(output_dir, exist_ok=True)
+    
+    def _load_manifest(self) -> Dict[str, list]:
+        try:
+            with open(os.path.join(self.output_dir, self.MANIFEST), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return manifest.get('sources', {}) if manifest.get('settings') == self.settings else {}
+    
+    def url(self, name: str) -> str:
+        return f"{self.prefix}/{name}" if self.prefix else name
+    
+    def run(self, sources: Iterable[str], workers: int = 1) -> Dict[str, Optional[str]]:
+        """Thumbnail file names for ``sources``; None for missing or unreadable photos"""
+        known = self._load_manifest()
+        names = {}
+        jobs = []
+        for source in dict.fromkeys(sources):
+            try:
+                stat = os.stat(source)
+            except OSError:
+                names[source] = None
+                continue
+            entry = known.get(source)
+            if (entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns
+                    and os.path.exists(os.path.join(self.output_dir, entry[2]))):
+                names[source] = entry[2]
+            else:
+                jobs.append((source, self.output_dir, self.max_size, self.image_format, self.quality))
+        
+        with contextlib.ExitStack() as stack:
+            if workers > 1 and len(jobs) > 1:
+                pool = stack.enter_context(pool_context().Pool(min(workers, len(jobs))))
+                results = pool.imap_unordered(_make_thumbnail, jobs, chunksize=4)
+            else:
+                results = map(_make_thumbnail, jobs)
+            errors = 0
+            for source, name, error in results:
+                names[source] = name
+                if error:
+                    errors += 1
+                    if errors <= 5:
+                        print(f"  ✗ {source}: {error}")
+        
+        sources_manifest = {}
+        for source, name in names.items():
+            if name:
+                stat = os.stat(source)
+                sources_manifest[source] = [stat.st_size, stat.st_mtime_ns, name]
+        with open(os.path.join(self.output_dir, self.MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump({'settings': self.settings, 'sources': sources_manifest}, f, ensure_ascii=False)
+        
+        print(f"✓ Thumbnails: {len(jobs) - errors} new, {len(names) - len(jobs)} cached, {errors} failed")
+        return names
@@ -0,0 +1,165 @@
+"""
+Recipe Model
+The recipe record shared by the extractor, its output writers and the query service
+"""
+
+import multiprocessing
+import re
+import sys
+import weakref
+from typing import Dict, Iterable, List, Optional
+
+
+class Vocabulary:
+    """Append-only table of repeated strings (categories, tags, ...) and their process-local int ids"""
+    
+    _shared = None
+    
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+    
+    @classmethod
+    def shared(cls) -> 'Vocabulary':
+        """Default vocabulary of new recipes, weakly referenced so it is freed with its last recipe"""
+        vocabulary = cls._shared() if cls._shared is not None else None
+        if vocabulary is None:
+            vocabulary = cls()
+            cls._shared = weakref.ref(vocabulary)
+        return vocabulary
+    
+    def id(self, value: str) -> int:
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        return value_id
+    
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class Recipe:
+    """Unified recipe structure.
+    
+    Categories, tags, difficulty and cuisine are stored as Vocabulary ids;
+    categories and tags read back as tuples. SOURCE_FIELDS (engagement and
+    photo paths) travel with the record but are not part of ``to_dict``.
+    """
+    
+    FIELDS = (
+        'id', 'title', 'description', 'ingredients', 'steps', 'categories', 'tags',
+        'source_post_id', 'post_date', 'images', 'servings', 'cooking_time', 'difficulty',
+        'cuisine', 'channel', 'similar',
+    )
+    SOURCE_FIELDS = ('views', 'forwards', 'edit_date', 'photos')
+    __slots__ = (
+        'id', 'title', 'description', 'ingredients', 'steps', '_categories', '_tags',
+        'source_post_id', 'post_date', 'images', 'servings', 'cooking_time', '_difficulty',
+        '_cuisine', 'channel', 'similar', 'views', 'forwards', 'edit_date', 'photos', '_vocabulary',
+    )
+    
+    def __init__(self, id: str, title: str, description: str, ingredients: List[str], steps: List[str],
+                 categories: List[str], tags: List[str], source_post_id: int, post_date: str,
+                 images: List[str], servings: Optional[str] = None, cooking_time: Optional[str] = None,
+                 difficulty: Optional[str] = None, cuisine: Optional[str] = None,
+                 channel: Optional[str] = None, similar: Optional[List[str]] = None,
+                 views: Optional[int] = None, forwards: Optional[int] = None, edit_date: Optional[str] = None,
+                 photos: Optional[List[str]] = None, vocabulary: Optional[Vocabulary] = None):
+        self._vocabulary = vocabulary if vocabulary is not None else Vocabulary.shared()
+        self.id = id
+        self.title = title
+        self.description = description
+        self.ingredients = ingredients
+        self.steps = steps
+        self.categories = categories
+        self.tags = tags
+        self.source_post_id = source_post_id
+        self.post_date = post_date
+        self.images = images
+        self.servings = servings
+        self.cooking_time = cooking_time
+        self.difficulty = difficulty
+        self.cuisine = cuisine
+        self.channel = channel  # Set in merged multi-channel catalogs
+        self.similar = similar or None  # Ids of related recipes, when computed
+        self.views = views
+        self.forwards = forwards
+        self.edit_date = edit_date
+        self.photos = photos or []  # Export paths of attached photos, see attach_images
+    
+    @property
+    def categories(self) -> tuple:
+        values = self._vocabulary.values
+        return tuple(values[i] for i in self._categories)
+    
+    @categories.setter
+    def categories(self, values: Iterable[str]):
+        self._categories = tuple(self._vocabulary.id(value) for value in values)
+    
+    @property
+    def tags(self) -> tuple:
+        values = self._vocabulary.values
+        return tuple(values[i] for i in self._tags)
+    
+    @tags.setter
+    def tags(self, values: Iterable[str]):
+        self._tags = tuple(self._vocabulary.id(value) for value in values)
+    
+    @property
+    def difficulty(self) -> Optional[str]:
+        return None if self._difficulty is None else self._vocabulary.values[self._difficulty]
+    
+    @difficulty.setter
+    def difficulty(self, value: Optional[str]):
+        self._difficulty = None if value is None else self._vocabulary.id(value)
+    
+    @property
+    def cuisine(self) -> Optional[str]:
+        return None if self._cuisine is None else self._vocabulary.values[self._cuisine]
+    
+    @cuisine.setter
+    def cuisine(self, value: Optional[str]):
+        self._cuisine = None if value is None else self._vocabulary.id(value)
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Recipe':
+        return cls(**data)
+    
+    def to_dict(self):
+        """Convert to dictionary, excluding None values"""
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        data['categories'] = list(data['categories'])
+        data['tags'] = list(data['tags'])
+        return {k: v for k, v in data.items() if v is not None}
+    
+    def __reduce__(self):
+        # Vocabulary ids differ between processes; pickle the values
+        return type(self), tuple(getattr(self, field) for field in self.FIELDS + self.SOURCE_FIELDS)
+    
+    def __eq__(self, other):
+        if not isinstance(other, Recipe):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.FIELDS)
+    
+    def __repr__(self):
+        values = ', '.join(f"{field}={getattr(self, field)!r}" for field in self.FIELDS)
+        return f"{type(self).__name__}({values})"
+
+
+_COOKING_TIME_RE = re.compile(r'(\d+)\s*(час)?')
+
+
+def cooking_minutes(cooking_time: Optional[str]) -> Optional[int]:
+    """Minutes of a cooking time such as "20 минут" or "6 час", or None"""
+    match = _COOKING_TIME_RE.search(cooking_time or '')
+    if not match:
+        return None
+    return int(match.group(1)) * (60 if match.group(2) else 1)
+
+
+def pool_context():
+    """Process pool context; fork when available, so workers inherit compiled state"""
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Recipe Query Service
+Serves search, filtering and pagination over the extracted recipes from
+in-memory indexes, with the same semantics as filterRecipes in the Mini App
+given the search index
+"""
+
+import argparse
+import bisect
+import itertools
+import json
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import parse_qs, unquote, urlparse
+
+from recipe_columnar import ColumnarCatalog
+from recipe_model import Recipe, cooking_minutes
+from recipe_search_index import recipe_tokens, search_tokens
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CATALOG = os.path.join(BASE_DIR, 'recipes_extracted.json')
+
+
+def load_recipes(path: str) -> List[Recipe]:
+    """Recipes from extractor output: recipes JSON or a columnar catalog (.cols)"""
+    if path.endswith('.cols'):
+        with ColumnarCatalog(path) as catalog:
+            return list(catalog)
+    with open(path, 'r', encoding='utf-8') as f:
+        return [Recipe.from_dict(recipe) for recipe in json.load(f)['recipes']]
+
+
+class LRUCache:
+    """Thread-safe mapping that keeps the ``maxsize`` most recently used entries"""
+    
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+    
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+
+class RecipeQueryIndex:
+    """In-memory indexes over a recipe catalog.
+    
+    Categories, cuisines and difficulty map to sets of recipe ordinals, and
+    ``cooking_time`` is kept per recipe in minutes. Search works like
+    filterRecipes with the search index: every stemmed query token must be a
+    prefix of a token of the title, ingredients or description. Queries
+    without tokens (numbers, single letters) match a lowercased substring,
+    with a trigram index narrowing the candidates. Matching ordinals of
+    recent queries are kept in an LRU cache, so paging through results does
+    not redo the work.
+    """
+    
+    SEPARATOR = '\x00'  # Between searchable fields, so matches never span two of them
+    
+    def __init__(self, recipes: List[Recipe], cache_size: int = 1024):
+        self.recipes = recipes
+        self.by_id = {recipe.id: ordinal for ordinal, recipe in enumerate(recipes)}
+        self.encoded = [json.dumps(recipe.to_dict(), ensure_ascii=False) for recipe in recipes]
+        self.cache = LRUCache(cache_size)
+        
+        self.categories = {}
+        self.cuisines = {}
+        self.difficulty = {}
+        self.minutes = []
+        self.postings = {}
+        self.haystacks = []
+        self.trigrams = {}
+        for ordinal, recipe in enumerate(recipes):
+            for category in recipe.categories:
+                self.categories.setdefault(category, set()).add(ordinal)
+            if recipe.cuisine:
+                self.cuisines.setdefault(recipe.cuisine, set()).add(ordinal)
+            if recipe.difficulty:
+                self.difficulty.setdefault(recipe.difficulty, set()).add(ordinal)
+            
+            self.minutes.append(cooking_minutes(recipe.cooking_time))
+            
+            for token in recipe_tokens(recipe):
+                self.postings.setdefault(token, set()).add(ordinal)
+            fields = [recipe.title, *recipe.ingredients, recipe.description]
+            haystack = self.SEPARATOR.join(field.lower() for field in fields)
+            self.haystacks.append(haystack)
+            for i in range(len(haystack) - 2):
+                self.trigrams.setdefault(haystack[i:i + 3], set()).add(ordinal)
+        self.tokens = sorted(self.postings)
+    
+    @staticmethod
+    def query_key(search: str = '', categories: Iterable[str] = (), cuisines: Iterable[str] = (),
+                  difficulty: Optional[str] = None, max_time: Optional[int] = None) -> tuple:
+        """Normalized cache key; equivalent filters give the same key"""
+        return (search.lower(), tuple(sorted(set(categories))), tuple(sorted(set(cuisines))),
+                difficulty or None, max_time)
+    
+    def _search(self, search: str, candidates: Optional[Set[int]]) -> Set[int]:
+        tokens = search_tokens(search)
+        if tokens:
+            for prefix in tokens:
+                start = bisect.bisect_left(self.tokens, prefix)
+                matches = set()
+                for token in itertools.takewhile(lambda token: token.startswith(prefix),
+                                                 itertools.islice(self.tokens, start, None)):
+                    matches |= self.postings[token]
+                candidates = matches if candidates is None else candidates & matches
+                if not candidates:
+                    break
+            return candidates
+        if self.SEPARATOR in search:
+            return set()
+        if len(search) >= 3:
+            narrowed = None
+            for i in range(len(search) - 2):
+                postings = self.trigrams.get(search[i:i + 3], set())
+                narrowed = postings if narrowed is None else narrowed & postings
+                if not narrowed:
+                    return set()
+            candidates = narrowed if candidates is None else candidates & narrowed
+        elif candidates is None:
+            candidates = range(len(self.recipes))
+        return {ordinal for ordinal in candidates if search in self.haystacks[ordinal]}
+    
+    def _match(self, key: tuple) -> List[int]:
+        search, categories, cuisines, difficulty, max_time = key
+        candidates = None
+        
+        def narrow(ordinals: Set[int]):
+            nonlocal candidates
+            candidates = set(ordinals) if candidates is None else candidates & ordinals
+        
+        if categories:
+            narrow(set().union(*(self.categories.get(category, set()) for category in categories)))
+        if cuisines:
+            narrow(set().union(*(self.cuisines.get(cuisine, set()) for cuisine in cuisines)))
+        if difficulty:
+            narrow(self.difficulty.get(difficulty, set()))
+        if search:
+            candidates = self._search(search, candidates)
+        
+        ordinals = range(len(self.recipes)) if candidates is None else sorted(candidates)
+        if max_time is not None:
+            # Recipes without a cooking time are kept, as in filterRecipes
+            ordinals = [o for o in ordinals if self.minutes[o] is None or self.minutes[o] <= max_time]
+        return list(ordinals)
+    
+    def matching(self, **filters) -> List[int]:
+        """Ordinals of recipes matching the filters, in catalog order"""
+        key = self.query_key(**filters)
+        ordinals = self.cache.get(key)
+        if ordinals is None:
+            ordinals = self._match(key)
+            self.cache.put(key, ordinals)
+        return ordinals
+    
+    def query(self, page: int = 1, page_size: int = 20, **filters) -> Dict:
+        """One page of matching recipes plus the total count"""
+        ordinals = self.matching(**filters)
+        start = (page - 1) * page_size
+        return {
+            'total': len(ordinals),
+            'page': page,
+            'page_size': page_size,
+            'recipes': [self.recipes[o].to_dict() for o in ordinals[start:start + page_size]],
+        }
+    
+    def query_json(self, page: int = 1, page_size: int = 20, **filters) -> str:
+        """Like query, serialized; recipe JSON is encoded once at load time"""
+        ordinals = self.matching(**filters)
+        start = (page - 1) * page_size
+        recipes = ','.join(self.encoded[o] for o in ordinals[start:start + page_size])
+        return (f'{{"total":{len(ordinals)},"page":{page},"page_size":{page_size},'
+                f'"recipes":[{recipes}]}}')
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """GET /recipes?search=&category=&cuisine=&difficulty=&max_time=&page=&page_size=
+    GET /recipes/<id>, GET /health"""
+    
+    protocol_version = 'HTTP/1.1'  # Keep-alive; every response has a Content-Length
+    disable_nagle_algorithm = True  # Headers and body are separate writes; avoid delayed-ACK stalls
+    index: RecipeQueryIndex = None
+    max_page_size = 100
+    
+    def _send(self, status: int, body: str):
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def _error(self, status: int, message: str):
+        self._send(status, json.dumps({'error': message}, ensure_ascii=False))
+    
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/health':
+            cache = self.index.cache
+            self._send(200, json.dumps({'recipes': len(self.index.recipes), 'cache_hits': cache.hits,
+                                        'cache_misses': cache.misses}))
+        elif url.path == '/recipes':
+            params = parse_qs(url.query)
+            try:
+                max_time = params.get('max_time', [None])[0]
+                page = int(params.get('page', ['1'])[0])
+                page_size = int(params.get('page_size', ['20'])[0])
+                filters = {
+                    'search': params.get('search', [''])[0],
+                    'categories': params.get('category', []),
+                    'cuisines': params.get('cuisine', []),
+                    'difficulty': params.get('difficulty', [None])[0],
+                    'max_time': int(max_time) if max_time not in (None, '') else None,
+                }
+            except ValueError:
+                return self._error(400, "page, page_size and max_time must be integers")
+            if page < 1 or not 1 <= page_size <= self.max_page_size:
+                return self._error(400, f"page must be >= 1 and page_size in 1..{self.max_page_size}")
+            self._send(200, self.index.query_json(page, page_size, **filters))
+        elif url.path.startswith('/recipes/'):
+            ordinal = self.index.by_id.get(unquote(url.path[len('/recipes/'):]))
+            if ordinal is None:
+                return self._error(404, "Recipe not found")
+            self._send(200, self.index.encoded[ordinal])
+        else:
+            self._error(404, "Not found")
+    
+    def log_message(self, format, *args):
+        pass  # One line per request would dominate the cost of cached queries
+
+
+def make_server(index: RecipeQueryIndex, host: str = '127.0.0.1', port: int = 8080) -> ThreadingHTTPServer:
+    """HTTP server answering queries from ``index``; port 0 picks a free port"""
+    handler = type('BoundQueryRequestHandler', (QueryRequestHandler,), {'index': index})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Serve recipe search and filtering over HTTP")
+    parser.add_argument('catalog', nargs='?', default=DEFAULT_CATALOG,
+                        help="Extractor output: recipes JSON or a .cols columnar catalog")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--cache-size', type=int, default=1024, metavar='N',
+                        help="Number of distinct queries kept in the LRU cache (default: 1024)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Main execution function"""
+    args = parse_args(argv)
+    index = RecipeQueryIndex(load_recipes(args.catalog), args.cache_size)
+    server = make_server(index, args.host, args.port)
+    print(f"✓ Loaded {len(index.recipes)} recipes from {args.catalog}")
+    print(f"✓ Serving on http://{args.host}:{server.server_address[1]}/recipes")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
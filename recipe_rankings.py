@@ -0,0 +1,138 @@
+"""
+Recipe Rankings
+Time-decayed popularity scores and pre-sorted ranking lists of extracted recipes
+"""
+
+import heapq
+import json
+import math
+import os
+from array import array
+from typing import Dict, Optional
+from datetime import datetime, timezone
+
+from recipe_model import Recipe
+
+
+def post_timestamp(date: str) -> Optional[float]:
+    """POSIX time of an export date ("2025-11-11T07:57:50.000Z"); naive dates are UTC"""
+    if isinstance(date, str) and date.endswith('Z'):
+        date = date[:-1] + '+00:00'  # fromisoformat only accepts "Z" from Python 3.11
+    try:
+        parsed = datetime.fromisoformat(date)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class PopularityRanker:
+    """Time-decayed, channel-normalized popularity scores and pre-sorted ranking lists.
+    
+    Age is measured from the newest post in the catalog, so the same export
+    always gives the same rankings.
+    """
+    
+    FORWARD_WEIGHT = 10
+    HALF_LIFE_DAYS = 365
+    TRENDING_HALF_LIFE_DAYS = 14
+    TRENDING_WINDOW_DAYS = 90
+    
+    def __init__(self, limit: int = 100):
+        self.limit = limit
+        self.recipe_ids = []
+        self.engagement = array('d')
+        self.timestamps = array('d')
+        self.channels = []
+        self.categories = []
+        self.cuisines = []
+    
+    def add(self, recipe: Recipe):
+        self.recipe_ids.append(recipe.id)
+        self.engagement.append((recipe.views or 0) + self.FORWARD_WEIGHT * (recipe.forwards or 0))
+        timestamp = post_timestamp(recipe.post_date)
+        self.timestamps.append(math.nan if timestamp is None else timestamp)
+        self.channels.append(recipe.channel)
+        self.categories.append(recipe.categories)
+        self.cuisines.append(recipe.cuisine)
+    
+    @property
+    def reference(self) -> Optional[float]:
+        """Newest post time in the catalog, or None if no post has a date"""
+        return max((t for t in self.timestamps if not math.isnan(t)), default=None)
+    
+    def _channel_medians(self) -> Dict[Optional[str], float]:
+        values = {}
+        for channel, engagement in zip(self.channels, self.engagement):
+            values.setdefault(channel, []).append(engagement)
+        medians = {}
+        for channel, engagement in values.items():
+            engagement.sort()
+            middle = len(engagement) // 2
+            median = engagement[middle] if len(engagement) % 2 else (engagement[middle - 1] + engagement[middle]) / 2
+            medians[channel] = median or 1.0
+        return medians
+    
+    def scores(self, half_life_days: float) -> array:
+        """Popularity of every recipe, in insertion order; undated posts score 0,
+        unless no post has a date, in which case nothing decays"""
+        medians = self._channel_medians()
+        reference = self.reference
+        if reference is None:
+            return array('d', (e / medians[c] for e, c in zip(self.engagement, self.channels)))
+        rate = math.log(2) / (half_life_days * 86400)
+        return array('d', (
+            0.0 if math.isnan(t) else e / medians[c] * math.exp(-rate * (reference - t))
+            for e, t, c in zip(self.engagement, self.timestamps, self.channels)
+        ))
+    
+    def to_rankings(self) -> Dict:
+        limit = self.limit
+        scores = self.scores(self.HALF_LIFE_DAYS)
+        order = sorted(range(len(self.recipe_ids)), key=lambda o: (-scores[o], o))
+        
+        categories = {}
+        cuisines = {}
+        for ordinal in order:
+            recipe_id = self.recipe_ids[ordinal]
+            for category in self.categories[ordinal]:
+                ranked = categories.setdefault(category, [])
+                if len(ranked) < limit:
+                    ranked.append(recipe_id)
+            cuisine = self.cuisines[ordinal]
+            if cuisine:
+                ranked = cuisines.setdefault(cuisine, [])
+                if len(ranked) < limit:
+                    ranked.append(recipe_id)
+        
+        # Trending needs post dates; without any it stays empty
+        reference = self.reference
+        trending = []
+        if reference is not None:
+            window_start = reference - self.TRENDING_WINDOW_DAYS * 86400
+            trending_scores = self.scores(self.TRENDING_HALF_LIFE_DAYS)
+            recent = [o for o, t in enumerate(self.timestamps) if t >= window_start]
+            trending = heapq.nsmallest(limit, recent, key=lambda o: (-trending_scores[o], o))
+        
+        return {
+            'version': 1,
+            'reference_date': datetime.fromtimestamp(reference, timezone.utc).isoformat() if reference is not None else None,
+            'half_life_days': self.HALF_LIFE_DAYS,
+            'trending_half_life_days': self.TRENDING_HALF_LIFE_DAYS,
+            'trending_window_days': self.TRENDING_WINDOW_DAYS,
+            'overall': [self.recipe_ids[o] for o in order[:limit]],
+            'trending': [self.recipe_ids[o] for o in trending],
+            'categories': dict(sorted(categories.items())),
+            'cuisines': dict(sorted(cuisines.items())),
+            'scores': {self.recipe_ids[o]: round(scores[o], 4) for o in order},
+        }
+    
+    def save(self, rankings_file: str):
+        with open(rankings_file, 'w', encoding='utf-8') as f:
+            json.dump(self.to_rankings(), f, ensure_ascii=False, separators=(',', ':'))
+
+
+def rankings_path(output_file: str) -> str:
+    """Popularity rankings location for a recipes output file"""
+    return os.path.splitext(output_file)[0] + '.rankings.json'
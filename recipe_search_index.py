@@ -0,0 +1,301 @@
+"""
+Recipe Search Index
+Search tokenization, ingredient parsing and the prebuilt search index of an extraction run
+"""
+
+import base64
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from dataclasses import dataclass
+from functools import lru_cache
+
+from recipe_model import Recipe, cooking_minutes
+
+
+# Inflectional endings stripped by stem_token, longest first
+RUSSIAN_ENDINGS = (
+    'иями', 'ями', 'ами', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ией',
+    'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ый', 'ий', 'ой', 'ей', 'ую', 'юю',
+    'ым', 'им', 'ых', 'их', 'ам', 'ям', 'ах', 'ях', 'ом', 'ем', 'ов', 'ев',
+    'ью', 'ия', 'ть',
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+)
+REFLEXIVE_ENDINGS = ('ся', 'сь')
+MIN_STEM_LENGTH = 3
+
+# Tokenization of search text, published in the search index header so
+# clients can normalize queries the same way
+_TOKEN_RE = re.compile(r'[0-9a-zа-я]+')
+TOKEN_FOLDS = {'ё': 'е'}
+MIN_TOKEN_LENGTH = 2
+_TOKEN_FOLD_TABLE = str.maketrans(TOKEN_FOLDS)
+
+
+def stem_token(token: str) -> str:
+    """Cheap Russian stemmer: drop a reflexive ``-ся`` and one inflectional ending"""
+    if token.endswith(REFLEXIVE_ENDINGS) and len(token) - 2 >= MIN_STEM_LENGTH:
+        token = token[:-2]
+    for ending in RUSSIAN_ENDINGS:
+        if token.endswith(ending) and len(token) - len(ending) >= MIN_STEM_LENGTH:
+            return token[:-len(ending)]
+    return token
+
+
+def search_tokens(text: str) -> List[str]:
+    """Normalized, stemmed search tokens of a text (lowercase, ё → е, no bare numbers)"""
+    words = _TOKEN_RE.findall(text.lower().translate(_TOKEN_FOLD_TABLE))
+    return [stem_token(word) for word in words if len(word) >= MIN_TOKEN_LENGTH and not word.isdigit()]
+
+
+def recipe_tokens(recipe: Recipe) -> Set[str]:
+    """Search tokens of a recipe's title, ingredients and description"""
+    return set(search_tokens('\n'.join([recipe.title, *recipe.ingredients, recipe.description])))
+
+
+def _bitset(ordinals: Iterable[int], size: int) -> str:
+    """Base64 bitset with bit ``i`` (LSB-first within each byte) set per ordinal"""
+    bits = bytearray((size + 7) // 8)
+    for ordinal in ordinals:
+        bits[ordinal >> 3] |= 1 << (ordinal & 7)
+    return base64.b64encode(bytes(bits)).decode('ascii')
+
+
+# Measurement units, shared with the recipe indicators
+UNIT_PATTERN = r'(г|гр|грамм|кг|мл|л|ст\.?\s*л|ч\.?\s*л|столов\w+\s+лож\w+|чайн\w+\s+лож\w+)'
+LEMMA_CACHE_SIZE = 4096
+
+_AMOUNT = (r'(\d+(?:[.,]\d+)?(?:\s*[-–—/]\s*\d+(?:[.,]\d+)?)?|[½¼¾⅓⅔])\s*'
+           r'(?:' + UNIT_PATTERN + r'(?![а-яa-z])\.?)?')
+_AMOUNT_RE = re.compile(_AMOUNT)
+_INLINE_AMOUNT_RE = re.compile(r'(.+?)\s*(?:[—–]|\s-\s)\s*(.*)$')
+_TRAILING_AMOUNT_RE = re.compile(r'(.*?[а-яa-z].*?)\s+' + _AMOUNT + r'$')
+_STEP_LINE_RE = re.compile(r'\d+[.)]\s')
+_FIRST_WORD_RE = re.compile(r'[^а-яa-z]*([а-яa-z]+)')
+# Infinitive, past and first person plural endings of instructions like
+# "добавил 400 г фарша" or "разогреваем духовку"
+_STEP_VERB_ENDINGS = ('ить', 'ать', 'ять', 'еть', 'уть', 'ыть', 'ться', 'ил', 'ила', 'ел', 'ела',
+                      'али', 'или', 'аем', 'яем', 'уем', 'ием', 'ите')
+MIN_STEP_VERB_LENGTH = 6
+# Longer lines (notes in parentheses aside) are sentences, not ingredients
+MAX_LINE_WORDS = 8
+_ADJECTIVE_ENDINGS = ('ый', 'ий', 'ой', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ого', 'его',
+                      'ому', 'ему', 'ым', 'им', 'ых', 'их', 'ую', 'юю', 'ыми', 'ими')
+# Suffixes folding a denominal adjective onto its noun (лимонн → лимон,
+# курин → кур) and a noun onto its root (куриц → кур), longest first
+_ADJECTIVE_SUFFIXES = ('ин', 'ов', 'ев', 'н')
+_NOUN_SUFFIXES = ('иц',)
+# Words that are never the ingredient itself: counting words and filler
+_INGREDIENT_SKIP_STEMS = {
+    'зубчик', 'щепотк', 'пучок', 'пучк', 'шт', 'штук', 'веточк', 'стакан', 'банк',
+    'горст', 'кусочек', 'кусочк', 'ломтик', 'долек', 'дольк', 'упаковк', 'пачк', 'вкус', 'порци',
+    'или', 'без', 'для',
+}
+MAX_INGREDIENT_WORDS = 5
+
+
+@dataclass
+class ParsedIngredient:
+    """One ingredient line split into amount and normalized name"""
+    text: str
+    quantity: Optional[str] = None
+    unit: Optional[str] = None
+    name: Optional[str] = None
+    lemma: Optional[str] = None
+    stems: Tuple[str, ...] = ()
+
+
+def canonical_unit(unit: str) -> str:
+    """Single spelling per unit: "гр"/"грамм" → "г", "ст л"/"столовая ложка" → "ст. л." """
+    unit = unit.replace(' ', '').replace('.', '')
+    if unit.startswith('ст'):
+        return 'ст. л.'
+    if unit.startswith('ч'):
+        return 'ч. л.'
+    return 'г' if unit in ('гр', 'грамм') else unit
+
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def ingredient_lemma(name: str) -> Optional[str]:
+    """Normalized key of an ingredient name: the stem of its first noun-like word.
+    
+    Adjectives ("белого вина"), counting words ("зубчика чеснока") and short
+    words are skipped. Names longer than MAX_INGREDIENT_WORDS words are
+    sentences rather than ingredients and give None. Cached, because the same
+    few hundred names repeat across thousands of lines.
+    """
+    words = [word for word in _TOKEN_RE.findall(name.lower().replace('ё', 'е'))
+             if len(word) > 2 and not word.isdigit()]
+    if not words or len(words) > MAX_INGREDIENT_WORDS:
+        return None
+    stems = [stem_token(word) for word in words]
+    for word, stem in zip(words, stems):
+        if not word.endswith(_ADJECTIVE_ENDINGS) and stem not in _INGREDIENT_SKIP_STEMS:
+            return stem
+    return stems[-1] if stems[-1] not in _INGREDIENT_SKIP_STEMS else None
+
+
+def _fold_stem(stem: str, suffixes: Tuple[str, ...]) -> str:
+    for suffix in suffixes:
+        if stem.endswith(suffix) and len(stem) - len(suffix) >= MIN_STEM_LENGTH:
+            return stem[:-len(suffix)]
+    return stem
+
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def ingredient_stems(name: str) -> Tuple[str, ...]:
+    """Keys an ingredient name is indexed under: the folded stem of every noun
+    and of every adjective derived from a noun.
+    
+    "куриное филе" gives ``('кур', 'фил')`` and "сок лимона" ``('сок', 'лимон')``,
+    so both are found for "курица" and for "лимонный". Sentences (more than
+    MAX_INGREDIENT_WORDS words) give no keys.
+    """
+    words = [(word, stem_token(word)) for word in _TOKEN_RE.findall(name.lower().replace('ё', 'е'))
+             if len(word) > 2 and not word.isdigit()]
+    words = [(word, stem) for word, stem in words if stem not in _INGREDIENT_SKIP_STEMS]
+    if len(words) > MAX_INGREDIENT_WORDS:
+        return ()
+    keys = []
+    for word, stem in words:
+        if not word.endswith(_ADJECTIVE_ENDINGS):
+            keys.append(_fold_stem(stem, _NOUN_SUFFIXES))
+        elif _fold_stem(stem, _ADJECTIVE_SUFFIXES) != stem:
+            keys.append(_fold_stem(stem, _ADJECTIVE_SUFFIXES))
+    return tuple(dict.fromkeys(keys))
+
+
+def is_step_line(line: str) -> bool:
+    """Whether an ingredient line is really a step or prose: numbered, opening
+    with a verb, or longer than MAX_LINE_WORDS words"""
+    lowered = line.strip().lower()
+    if _STEP_LINE_RE.match(lowered):
+        return True
+    first = _FIRST_WORD_RE.match(lowered)
+    if first and len(first.group(1)) >= MIN_STEP_VERB_LENGTH and first.group(1).endswith(_STEP_VERB_ENDINGS):
+        return True
+    words = _TOKEN_RE.findall(re.sub(r'\([^)]*\)', '', lowered))
+    return sum(1 for word in words if len(word) > 2 and not word.isdigit()) > MAX_LINE_WORDS
+
+
+def parse_ingredient(line: str) -> ParsedIngredient:
+    """Split "200 мл белого вина", "мука — 200 г" or "курица 1 кг" into quantity, unit and name"""
+    text = line.strip()
+    lowered = text.lower()
+    parsed = ParsedIngredient(text)
+    if is_step_line(lowered):
+        return parsed  # a step that landed among the ingredients
+    
+    name = lowered
+    amount = _AMOUNT_RE.match(lowered)
+    if amount:
+        name = lowered[amount.end():]
+    else:
+        inline = _INLINE_AMOUNT_RE.match(lowered)
+        trailing = _TRAILING_AMOUNT_RE.match(lowered)
+        if inline:
+            name = inline.group(1)
+            amount = _AMOUNT_RE.match(inline.group(2))
+        elif trailing:
+            name = trailing.group(1)
+            amount = _AMOUNT_RE.match(lowered, trailing.start(2))
+    if amount:
+        parsed.quantity = amount.group(1)
+        if amount.group(2):
+            parsed.unit = canonical_unit(amount.group(2))
+    
+    # Drop notes: "(мелкая)", ", натертого"; a list ("соль, перец") keeps
+    # the stems of every item
+    parts = [part.strip(' .:;—–-+') for part in re.sub(r'\([^)]*\)', '', name).split(',')]
+    if parts[0]:
+        parsed.name = parts[0]
+        parsed.lemma = ingredient_lemma(parts[0])
+    parsed.stems = tuple(dict.fromkeys(stem for part in parts for stem in ingredient_stems(part)))
+    return parsed
+
+
+def recipes_with_ingredients(index: Dict, names: Iterable[str]) -> List[str]:
+    """Ids of recipes using all given ingredients, from a search index's ``ingredients`` postings.
+    
+    A name of several words ("куриная печень") needs every one of its keys.
+    """
+    matches = None
+    for name in names:
+        keys = ingredient_stems(name)
+        if not keys:
+            return []
+        for key in keys:
+            ordinals = set(index['ingredients'].get(key, ()))
+            matches = ordinals if matches is None else matches & ordinals
+            if not matches:
+                return []
+    return [index['recipe_ids'][ordinal] for ordinal in sorted(matches or ())]
+
+
+class SearchIndexBuilder:
+    """Accumulates a prebuilt search index (tokens, ingredient lemmas, facet bitsets) one recipe at a time.
+    
+    The header carries the tokenizer and stemmer settings queries must be normalized with.
+    """
+    
+    def __init__(self):
+        self.recipe_ids = []
+        self.postings = {}
+        self.ingredients = {}
+        self.facets = {'categories': {}, 'cuisines': {}, 'difficulty': {}}
+        self.cooking_minutes = []
+    
+    def add(self, recipe: Recipe):
+        ordinal = len(self.recipe_ids)
+        self.recipe_ids.append(recipe.id)
+        
+        for token in recipe_tokens(recipe):
+            self.postings.setdefault(token, []).append(ordinal)
+        keys = {key for line in recipe.ingredients for key in parse_ingredient(line).stems}
+        for key in sorted(keys):
+            self.ingredients.setdefault(key, []).append(ordinal)
+        
+        for category in recipe.categories:
+            self.facets['categories'].setdefault(category, []).append(ordinal)
+        if recipe.cuisine:
+            self.facets['cuisines'].setdefault(recipe.cuisine, []).append(ordinal)
+        if recipe.difficulty:
+            self.facets['difficulty'].setdefault(recipe.difficulty, []).append(ordinal)
+        
+        self.cooking_minutes.append(cooking_minutes(recipe.cooking_time))
+    
+    def to_index(self) -> Dict:
+        size = len(self.recipe_ids)
+        return {
+            'version': 1,
+            'tokenizer': {
+                'lowercase': True,
+                'folds': TOKEN_FOLDS,
+                'pattern': _TOKEN_RE.pattern,
+                'min_length': MIN_TOKEN_LENGTH,
+                'drop_numbers': True,
+            },
+            'stemmer': {
+                'reflexive': list(REFLEXIVE_ENDINGS),
+                'endings': list(RUSSIAN_ENDINGS),
+                'min_stem_length': MIN_STEM_LENGTH,
+            },
+            'recipe_ids': self.recipe_ids,
+            'tokens': dict(sorted(self.postings.items())),
+            'ingredients': dict(sorted(self.ingredients.items())),
+            **{
+                facet: {value: _bitset(ordinals, size) for value, ordinals in sorted(values.items())}
+                for facet, values in self.facets.items()
+            },
+            'cooking_minutes': self.cooking_minutes,
+        }
+    
+    def save(self, index_file: str):
+        with open(index_file, 'w', encoding='utf-8') as f:
+            json.dump(self.to_index(), f, ensure_ascii=False, separators=(',', ':'))
+
+
+def index_path(output_file: str) -> str:
+    """Search index location for a recipes output file"""
+    return os.path.splitext(output_file)[0] + '.index.json'
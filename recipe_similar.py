@@ -0,0 +1,99 @@
+"""
+Similar Recipes
+Top-k similar recipes from sparse TF-IDF vectors
+"""
+
+import heapq
+import math
+from typing import Dict, Iterable, List
+
+from recipe_model import Recipe
+from recipe_search_index import parse_ingredient, search_tokens
+
+
+class SimilarRecipes:
+    """Top-k "similar recipes" from sparse TF-IDF vectors, blocked by category.
+    
+    At most MAX_CANDIDATES candidates per recipe are scored exactly.
+    """
+    
+    # Relative weight of the one-hot features against the TF-IDF terms
+    FACET_WEIGHT = 0.5
+    # Per recipe: stop collecting candidates after this many, and read at
+    # most SCAN_LIMIT entries of any one term's postings
+    MAX_CANDIDATES = 100
+    SCAN_LIMIT = 1000
+    
+    def __init__(self, k: int = 5, methods: Iterable[str] = ()):
+        self.k = k
+        self.methods = set(methods)
+    
+    def terms(self, recipe: Recipe) -> List[str]:
+        lemmas = (parse_ingredient(line).lemma for line in recipe.ingredients)
+        return ([f"i:{lemma}" for lemma in lemmas if lemma]
+                + [f"t:{token}" for token in search_tokens(recipe.title)])
+    
+    def facets(self, recipe: Recipe) -> List[str]:
+        features = [f"c:{category}" for category in recipe.categories]
+        if recipe.cuisine:
+            features.append(f"q:{recipe.cuisine}")
+        features.extend(f"m:{tag}" for tag in recipe.tags if tag in self.methods)
+        return features
+    
+    def vectors(self, recipes: List[Recipe]) -> List[Dict[str, float]]:
+        """Normalized sparse vector (feature -> weight) per recipe"""
+        counts = []
+        document_frequency = {}
+        for recipe in recipes:
+            tf = {}
+            for term in self.terms(recipe):
+                tf[term] = tf.get(term, 0) + 1
+            counts.append(tf)
+            for term in tf:
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+        
+        vectors = []
+        for recipe, tf in zip(recipes, counts):
+            vector = {term: count * math.log(1 + len(recipes) / document_frequency[term])
+                      for term, count in tf.items()}
+            for feature in self.facets(recipe):
+                vector[feature] = self.FACET_WEIGHT
+            norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+            vectors.append({feature: weight / norm for feature, weight in vector.items()} if norm else {})
+        return vectors
+    
+    def neighbours(self, recipes: List[Recipe]) -> List[List[int]]:
+        """Positions of the top-k most similar recipes for every recipe"""
+        vectors = self.vectors(recipes)
+        blocks = [frozenset(recipe.categories) for recipe in recipes]
+        # Impact-ordered postings of the TF-IDF terms: highest weight first
+        postings = {}
+        for position, vector in enumerate(vectors):
+            for feature, weight in vector.items():
+                if feature[0] in 'it':
+                    postings.setdefault(feature, []).append((weight, position))
+        for entries in postings.values():
+            entries.sort(key=lambda entry: (-entry[0], entry[1]))
+        
+        result = []
+        for position, vector in enumerate(vectors):
+            # Candidates share a category and a term; rare terms are tried first
+            candidates = set()
+            terms = sorted((feature for feature in vector if feature in postings), key=lambda f: len(postings[f]))
+            for term in terms:
+                for _, other in postings[term][:self.SCAN_LIMIT]:
+                    if other != position and not blocks[position].isdisjoint(blocks[other]):
+                        candidates.add(other)
+                        if len(candidates) >= self.MAX_CANDIDATES:
+                            break
+                else:
+                    continue
+                break
+            
+            scores = []
+            for other in candidates:
+                small, large = sorted((vector, vectors[other]), key=len)
+                scores.append((sum(weight * large.get(feature, 0.0) for feature, weight in small.items()), other))
+            best = heapq.nsmallest(self.k, scores, key=lambda item: (-item[0], item[1]))
+            result.append([other for _, other in best])
+        return result
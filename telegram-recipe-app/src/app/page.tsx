@@ -2,7 +2,8 @@
 
 import { useState, useMemo, useEffect } from 'react';
 import recipesData from '@/data/recipes_extracted.json';
-import { Recipe, FilterState } from '@/types/recipe';
+import rankingsData from '@/data/recipes_extracted.rankings.json';
+import { Recipe, RecipeRankings, FilterState, SearchIndex } from '@/types/recipe';
 import SearchBar from '@/components/SearchBar';
 import FilterPanel from '@/components/FilterPanel';
 import RecipeCard from '@/components/RecipeCard';
@@ -21,18 +22,31 @@ export default function Home() {
   
   const [showFilters, setShowFilters] = useState(false);
   
+  const [searchIndex, setSearchIndex] = useState<SearchIndex>();
+  
   const recipes: Recipe[] = recipesData.recipes;
-  const recipeOfTheDay = useMemo(() => getRecipeOfTheDay(recipes), [recipes]);
+  // Small enough to ship with the page, so the recipe of the day does not
+  // change once the first render is on screen
+  const rankings = rankingsData as RecipeRankings;
+  const recipeOfTheDay = useMemo(() => getRecipeOfTheDay(recipes, rankings), [recipes, rankings]);
   
   const filteredRecipes = useMemo(() => {
-    return filterRecipes(recipes, filters);
-  }, [recipes, filters]);
+    return filterRecipes(recipes, filters, searchIndex);
+  }, [recipes, filters, searchIndex]);
   
   useEffect(() => {
     // Hide back button on main page
     hideBackButton();
   }, []);
   
+  useEffect(() => {
+    // The search index is a separate chunk loaded after the first render;
+    // until it arrives, filterRecipes searches by substring
+    import('@/data/recipes_extracted.index.json').then((module) => {
+      setSearchIndex(module.default as SearchIndex);
+    });
+  }, []);
+  
   const hasActiveFilters = 
     filters.categories.length > 0 ||
     filters.cuisines.length > 0 ||
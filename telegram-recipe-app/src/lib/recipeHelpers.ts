@@ -1,9 +1,77 @@
-import { Recipe, FilterState } from '@/types/recipe';
+import { Recipe, FilterState, VersionedCatalog, CatalogDelta, RecipeRankings, SearchIndex } from '@/types/recipe';
 
-export const filterRecipes = (recipes: Recipe[], filters: FilterState): Recipe[] => {
+// Stem a token the way the extractor's stem_token does, with the index's stemmer settings
+export const stemToken = (token: string, stemmer: SearchIndex['stemmer']): string => {
+  const reflexive = stemmer.reflexive.find(ending => token.endsWith(ending));
+  if (reflexive && token.length - reflexive.length >= stemmer.min_stem_length) {
+    token = token.slice(0, -reflexive.length);
+  }
+  for (const ending of stemmer.endings) {
+    if (token.endsWith(ending) && token.length - ending.length >= stemmer.min_stem_length) {
+      return token.slice(0, -ending.length);
+    }
+  }
+  return token;
+};
+
+// Normalized, stemmed tokens of a text, matching the tokens of a search index
+export const searchTokens = (text: string, index: Pick<SearchIndex, 'tokenizer' | 'stemmer'>): string[] => {
+  const { tokenizer, stemmer } = index;
+  let normalized = tokenizer.lowercase ? text.toLowerCase() : text;
+  for (const [from, to] of Object.entries(tokenizer.folds)) {
+    normalized = normalized.split(from).join(to);
+  }
+  const words = normalized.match(new RegExp(tokenizer.pattern, 'g')) ?? [];
+  return words
+    .filter(word => word.length >= tokenizer.min_length && !(tokenizer.drop_numbers && /^\d+$/.test(word)))
+    .map(word => stemToken(word, stemmer));
+};
+
+const sortedTokens = new WeakMap<SearchIndex, string[]>();
+
+// Ordinals of the recipes that have every query token, or null for a query
+// without tokens. Query tokens match indexed tokens they are a prefix of, so
+// a half-typed word still finds recipes.
+export const searchIndexOrdinals = (index: SearchIndex, query: string): Set<number> | null => {
+  const queryTokens = searchTokens(query, index);
+  if (queryTokens.length === 0) return null;
+  
+  let tokens = sortedTokens.get(index);
+  if (!tokens) {
+    tokens = Object.keys(index.tokens).sort();
+    sortedTokens.set(index, tokens);
+  }
+  
+  let result: Set<number> | null = null;
+  for (const prefix of queryTokens) {
+    let low = 0;
+    let high = tokens.length;
+    while (low < high) {
+      const mid = (low + high) >> 1;
+      if (tokens[mid] < prefix) low = mid + 1;
+      else high = mid;
+    }
+    const matches = new Set<number>();
+    for (let i = low; i < tokens.length && tokens[i].startsWith(prefix); i++) {
+      index.tokens[tokens[i]].forEach(ordinal => matches.add(ordinal));
+    }
+    result = result === null ? matches : new Set(Array.from(result).filter(ordinal => matches.has(ordinal)));
+  }
+  return result;
+};
+
+// With a search index, the search goes through its tokens; recipes the index
+// does not know, and queries without tokens, fall back to substring matching
+export const filterRecipes = (recipes: Recipe[], filters: FilterState, index?: SearchIndex): Recipe[] => {
+  const ordinals = index && filters.search ? searchIndexOrdinals(index, filters.search) : null;
+  const indexed = index && ordinals ? new Set(index.recipe_ids) : null;
+  const found = index && ordinals ? new Set(Array.from(ordinals, ordinal => index.recipe_ids[ordinal])) : null;
+  
   return recipes.filter((recipe) => {
     // Search filter
-    if (filters.search) {
+    if (found && indexed?.has(recipe.id)) {
+      if (!found.has(recipe.id)) return false;
+    } else if (filters.search) {
       const searchLower = filters.search.toLowerCase();
       const matchesTitle = recipe.title.toLowerCase().includes(searchLower);
       const matchesIngredients = recipe.ingredients.some(ing => 
@@ -39,13 +107,10 @@ export const filterRecipes = (recipes: Recipe[], filters: FilterState): Recipe[]
     }
     
     // Time filter
-    if (filters.maxTime !== null && recipe.cooking_time) {
-      const timeMatch = recipe.cooking_time.match(/(\d+)/);
-      if (timeMatch) {
-        const minutes = parseInt(timeMatch[1]);
-        if (minutes > filters.maxTime) {
-          return false;
-        }
+    if (filters.maxTime !== null) {
+      const minutes = extractCookingTime(recipe.cooking_time);
+      if (minutes !== null && minutes > filters.maxTime) {
+        return false;
       }
     }
     
@@ -53,7 +118,7 @@ export const filterRecipes = (recipes: Recipe[], filters: FilterState): Recipe[]
   });
 };
 
-export const getRecipeOfTheDay = (recipes: Recipe[]): Recipe | null => {
+export const getRecipeOfTheDay = (recipes: Recipe[], rankings?: RecipeRankings): Recipe | null => {
   if (recipes.length === 0) return null;
   
   // Use current date as seed for consistent "recipe of the day"
@@ -62,8 +127,17 @@ export const getRecipeOfTheDay = (recipes: Recipe[]): Recipe | null => {
     (today.getTime() - new Date(today.getFullYear(), 0, 0).getTime()) / 86400000
   );
   
-  const index = dayOfYear % recipes.length;
-  return recipes[index];
+  // Rotate through the most popular recipes when rankings are available
+  const popular = rankings ? getRankedRecipes(recipes, rankings.overall) : [];
+  const pool = popular.length > 0 ? popular : recipes;
+  const index = dayOfYear % pool.length;
+  return pool[index];
+};
+
+// Recipes in the order of a precomputed ranking list (see *.rankings.json)
+export const getRankedRecipes = (recipes: Recipe[], rankedIds: string[]): Recipe[] => {
+  const byId = new Map(recipes.map(recipe => [recipe.id, recipe]));
+  return rankedIds.flatMap(id => byId.get(id) ?? []);
 };
 
 export const getUniqueCategories = (recipes: Recipe[]): string[] => {
@@ -88,10 +162,11 @@ export const getDifficulties = (): string[] => {
   return ['Легко', 'Средне', 'Сложно'];
 };
 
+// Minutes of a cooking time such as "20 минут" or "6 час", like cooking_minutes in recipe_model.py
 export const extractCookingTime = (cookingTime?: string): number | null => {
   if (!cookingTime) return null;
-  const match = cookingTime.match(/(\d+)/);
-  return match ? parseInt(match[1]) : null;
+  const match = cookingTime.match(/(\d+)\s*(час)?/);
+  return match ? parseInt(match[1]) * (match[2] ? 60 : 1) : null;
 };
 
 export const formatCookingTime = (minutes: number): string => {
@@ -130,3 +205,27 @@ export const getPlaceholderImage = (recipe: Recipe): string => {
   return `data:image/svg+xml,${encodeURIComponent(svg)}`;
 };
 
+export const applyCatalogDelta = (catalog: VersionedCatalog, delta: CatalogDelta): VersionedCatalog => {
+  if (delta.from !== catalog.version) {
+    throw new Error(`Delta v${delta.from}-v${delta.to} does not apply to catalog v${catalog.version}`);
+  }
+  
+  const byId = new Map(catalog.recipes.map(recipe => [recipe.id, recipe]));
+  const hashes = { ...catalog.hashes, ...delta.hashes };
+  for (const recipe of [...delta.added, ...delta.changed]) {
+    byId.set(recipe.id, recipe);
+  }
+  for (const id of delta.removed) {
+    byId.delete(id);
+    delete hashes[id];
+  }
+  
+  const order = delta.order ?? catalog.recipes.map(recipe => recipe.id).filter(id => byId.has(id));
+  return {
+    version: delta.to,
+    metadata: delta.metadata,
+    hashes,
+    recipes: order.map(id => byId.get(id)!),
+  };
+};
+
@@ -13,6 +13,7 @@ export interface Recipe {
   cooking_time?: string;
   difficulty?: string;
   cuisine?: string;
+  similar?: string[];
 }
 
 export interface RecipeData {
@@ -26,6 +27,59 @@ export interface RecipeData {
   recipes: Recipe[];
 }
 
+export interface VersionedCatalog extends RecipeData {
+  version: number;
+  hashes: Record<string, string>;
+}
+
+export interface CatalogDelta {
+  from: number;
+  to: number;
+  metadata: RecipeData['metadata'];
+  added: Recipe[];
+  changed: Recipe[];
+  removed: string[];
+  hashes: Record<string, string>;
+  order?: string[];
+}
+
+export interface RecipeRankings {
+  version: number;
+  reference_date: string | null;
+  half_life_days: number;
+  trending_half_life_days: number;
+  trending_window_days: number;
+  overall: string[];
+  trending: string[];
+  categories: Record<string, string[]>;
+  cuisines: Record<string, string[]>;
+  scores: Record<string, number>;
+}
+
+// Prebuilt search index (*.index.json); the header describes how tokens were normalized
+export interface SearchIndex {
+  version: number;
+  tokenizer: {
+    lowercase: boolean;
+    folds: Record<string, string>;
+    pattern: string;
+    min_length: number;
+    drop_numbers: boolean;
+  };
+  stemmer: {
+    reflexive: string[];
+    endings: string[];
+    min_stem_length: number;
+  };
+  recipe_ids: string[];
+  tokens: Record<string, number[]>;
+  ingredients: Record<string, number[]>;
+  categories: Record<string, string>;
+  cuisines: Record<string, string>;
+  difficulty: Record<string, string>;
+  cooking_minutes: (number | null)[];
+}
+
 export interface FilterState {
   search: string;
   categories: string[];
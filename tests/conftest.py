@@ -0,0 +1,39 @@
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from recipe_model import Recipe  # noqa: E402
+
+EXPORT_FILE = os.path.join(ROOT, 'kerzmaneat_1763203806174.json')
+
+
+def make_recipe(post_id: int, **fields) -> Recipe:
+    """A small recipe; ``fields`` override the defaults"""
+    values = {
+        'id': f"recipe_{post_id}",
+        'title': f"Рецепт {post_id}",
+        'description': 'Описание',
+        'ingredients': ['2 яйца', '200 г муки'],
+        'steps': ['Смешать', 'Запечь'],
+        'categories': ['Выпечка'],
+        'tags': ['Запекание'],
+        'source_post_id': post_id,
+        'post_date': '2025-01-15T10:00:00',
+        'images': [],
+        'cooking_time': '40 минут',
+        'difficulty': 'Легко',
+        'cuisine': 'Русская',
+    }
+    values.update(fields)
+    return Recipe(**values)
+
+
+@pytest.fixture(scope='session')
+def export_messages():
+    with open(EXPORT_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)['messages']
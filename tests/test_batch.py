@@ -0,0 +1,58 @@
+import json
+
+from recipe_extractor import RecipeExtractor
+
+
+def write_export(path, channel, messages, **header):
+    path.parent.mkdir(exist_ok=True)
+    path.write_text(json.dumps({'channel': channel, **header, 'messages': messages}, ensure_ascii=False),
+                    encoding='utf-8')
+    return str(path)
+
+
+def recipe_posts(path):
+    extractor = RecipeExtractor(path)
+    extractor.extract_recipes()
+    return [recipe.source_post_id for recipe in extractor.recipes]
+
+
+def test_ids_are_unique_across_channels_and_overlapping_exports(tmp_path, export_messages):
+    messages = [dict(message) for message in export_messages[:500]]
+    first = write_export(tmp_path / 'a' / 'old.json', 'kitchen', messages[:300], totalMessages=300)
+    posts = recipe_posts(first)
+    overlap = next(post for post in posts if post in {m.get('id') for m in messages[200:300]})
+    messages = [dict(message, photo='photos/new.jpg') if message.get('id') == overlap else message
+                for message in messages]
+    second = write_export(tmp_path / 'b' / 'new.json', 'kitchen', messages[200:], totalMessages=500)
+    other = write_export(tmp_path / 'other.json', 'bakery', messages[:300], channelTitle='Пекарня')
+    
+    extractor = RecipeExtractor(first)
+    recipes = extractor.extract_batch([first, second, other])
+    ids = [recipe.id for recipe in recipes]
+    assert len(ids) == len(set(ids))
+    kitchen = [recipe for recipe in recipes if recipe.channel == 'kitchen']
+    bakery = [recipe for recipe in recipes if recipe.channel == 'bakery']
+    assert sorted(recipe.source_post_id for recipe in kitchen) == sorted(recipe_posts(write_export(
+        tmp_path / 'all.json', 'kitchen', messages)))
+    assert [recipe.source_post_id for recipe in bakery] == recipe_posts(other)
+    assert all(recipe.id == f"recipe_{recipe.channel}_{recipe.source_post_id}" for recipe in recipes)
+    
+    # The overlapping post comes from the later export, with its photos resolved there
+    merged = next(recipe for recipe in kitchen if recipe.source_post_id == overlap)
+    assert merged.photos == [str(tmp_path / 'b' / 'photos' / 'new.jpg')]
+    
+    assert extractor.message_count == 500 + 300
+    assert extractor.channels == [
+        {'channel': 'kitchen', 'channel_title': None, 'source_files': ['old.json', 'new.json'],
+         'original_total_messages': 500},
+        {'channel': 'bakery', 'channel_title': 'Пекарня', 'source_files': ['other.json'],
+         'original_total_messages': None},
+    ]
+
+
+def test_parallel_batch_matches_sequential(tmp_path, export_messages):
+    exports = [write_export(tmp_path / f"{name}.json", name, export_messages[i * 150:(i + 1) * 150])
+               for i, name in enumerate(['one', 'two', 'three'])]
+    sequential = RecipeExtractor(exports[0]).extract_batch(exports)
+    parallel = RecipeExtractor(exports[0]).extract_batch(exports, workers=2)
+    assert [recipe.to_dict() for recipe in parallel] == [recipe.to_dict() for recipe in sequential]
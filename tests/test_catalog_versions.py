@@ -0,0 +1,93 @@
+import json
+import os
+
+from recipe_catalog import CatalogVersionWriter, recipe_hash
+
+from conftest import make_recipe
+
+
+def write_version(output_dir, recipes):
+    writer = CatalogVersionWriter(str(output_dir))
+    for recipe in recipes:
+        writer.add(recipe)
+    return writer.close({'total_recipes': len(recipes)})
+
+
+def load(output_dir, name):
+    with open(output_dir / name, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def apply_delta(catalog, delta):
+    """Python twin of applyCatalogDelta in the app's recipeHelpers.ts"""
+    assert delta['from'] == catalog['version']
+    by_id = {recipe['id']: recipe for recipe in catalog['recipes']}
+    hashes = {**catalog['hashes'], **delta['hashes']}
+    for recipe in delta['added'] + delta['changed']:
+        by_id[recipe['id']] = recipe
+    for recipe_id in delta['removed']:
+        del by_id[recipe_id]
+        del hashes[recipe_id]
+    order = delta.get('order') or [recipe['id'] for recipe in catalog['recipes'] if recipe['id'] in by_id]
+    return {'version': delta['to'], 'hashes': hashes, 'recipes': [by_id[i] for i in order]}
+
+
+def test_recipe_hash_ignores_category_and_tag_order():
+    body = make_recipe(1, categories=['Выпечка', 'Десерты'], tags=['Запекание', 'Сладкое']).to_dict()
+    reordered = dict(body, categories=['Десерты', 'Выпечка'], tags=['Сладкое', 'Запекание'])
+    assert recipe_hash(body) == recipe_hash(reordered)
+    assert recipe_hash(body) != recipe_hash(dict(body, title='Другое'))
+
+
+def test_delta_round_trip(tmp_path):
+    recipes = [make_recipe(i) for i in range(6)]
+    first = write_version(tmp_path, recipes)
+    catalog = load(tmp_path, first['catalog'])
+
+    recipes = [recipes[1], recipes[0], make_recipe(2, steps=['Смешать', 'Жарить']), *recipes[4:], make_recipe(9)]
+    second = write_version(tmp_path, recipes)
+    assert second['version'] == first['version'] + 1
+    delta = load(tmp_path, second['deltas'][-1]['file'])
+    assert [recipe['id'] for recipe in delta['added']] == ['recipe_9']
+    assert [recipe['id'] for recipe in delta['changed']] == ['recipe_2']
+    assert delta['removed'] == ['recipe_3']
+
+    patched = apply_delta(catalog, delta)
+    current = load(tmp_path, second['catalog'])
+    assert patched['recipes'] == current['recipes'] == [recipe.to_dict() for recipe in recipes]
+    assert patched['hashes'] == current['hashes']
+    assert all(recipe_hash(body) == patched['hashes'][body['id']] for body in patched['recipes'])
+
+
+def test_unchanged_run_keeps_the_version(tmp_path):
+    recipes = [make_recipe(i) for i in range(3)]
+    first = write_version(tmp_path, recipes)
+    second = write_version(tmp_path, recipes)
+    assert second['version'] == first['version']
+    assert second.get('unchanged')
+
+
+def test_previous_hashes_come_from_the_sidecar(tmp_path):
+    recipes = [make_recipe(i) for i in range(3)]
+    first = write_version(tmp_path, recipes)
+    assert load(tmp_path, first['hashes'])['hashes'] == load(tmp_path, first['catalog'])['hashes']
+    
+    # Only the sidecar is read: a truncated snapshot still gives a delta
+    with open(tmp_path / first['catalog'], 'w', encoding='utf-8') as f:
+        f.write('{"version":')
+    second = write_version(tmp_path, recipes[:2])
+    delta = load(tmp_path, second['deltas'][-1]['file'])
+    assert (delta['added'], delta['changed'], delta['removed']) == ([], [], ['recipe_2'])
+    assert sorted(name for name in os.listdir(tmp_path) if not name.endswith('.br')) == sorted([
+        'versions.json', second['catalog'], second['catalog'] + '.gz', second['hashes'],
+        second['deltas'][-1]['file'], second['deltas'][-1]['file'] + '.gz',
+    ])
+
+
+def test_reads_hashes_of_a_catalog_without_sidecar(tmp_path):
+    recipes = [make_recipe(i) for i in range(3)]
+    first = write_version(tmp_path, recipes)
+    os.remove(tmp_path / first.pop('hashes'))
+    with open(tmp_path / 'versions.json', 'w', encoding='utf-8') as f:
+        json.dump(first, f)
+    assert write_version(tmp_path, recipes).get('unchanged')
@@ -0,0 +1,51 @@
+import pytest
+
+from recipe_columnar import ColumnarCatalog, ColumnarWriter
+
+from conftest import make_recipe
+
+
+def sample_recipes():
+    return [
+        make_recipe(30, similar=['recipe_4']),
+        make_recipe(4, difficulty=None, cuisine=None, categories=['Супы', 'Горячее'], tags=[]),
+        make_recipe(512, title='Сырники', servings='4 порции', channel='other', images=['thumbs/a.webp']),
+    ]
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = str(tmp_path / 'recipes.cols')
+    writer = ColumnarWriter(path)
+    for recipe in sample_recipes():
+        writer.add(recipe)
+    writer.close({'total_recipes': 3, 'channel': 'test'})
+    with ColumnarCatalog(path) as catalog:
+        yield catalog
+
+
+def test_round_trip(catalog):
+    assert len(catalog) == 3
+    assert catalog.metadata == {'total_recipes': 3, 'channel': 'test'}
+    assert list(catalog) == sample_recipes()
+    assert [recipe.to_dict() for recipe in catalog] == [recipe.to_dict() for recipe in sample_recipes()]
+
+
+def test_ordinal_by_id(catalog):
+    assert [catalog.ordinal(f"recipe_{i}") for i in (30, 4, 512)] == [0, 1, 2]
+    assert catalog.ordinal('recipe_5') is None
+    assert catalog.ordinal('') is None
+    assert catalog.get('recipe_512').title == 'Сырники'
+    assert catalog.get('recipe_999') is None
+
+
+def test_value_and_filter(catalog):
+    assert catalog.value(1, 'categories') == ['Супы', 'Горячее']
+    assert catalog.value(1, 'cuisine') is None
+    assert catalog.value(2, 'source_post_id') == 512
+    assert catalog.filter(category='Выпечка') == [0, 2]
+    assert catalog.filter(category='Выпечка', cuisine='Русская', difficulty='Легко') == [0, 2]
+    assert catalog.filter(tag='Запекание', category='Супы') == []
+    assert catalog.filter(category='Нет такой') == []
+    with pytest.raises(IndexError):
+        catalog.recipe(3)
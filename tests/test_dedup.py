@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from recipe_dedup import RecipeDeduplicator
+
+from conftest import make_recipe
+
+STEPS = [
+    'Разогреть духовку до 180 градусов и смазать форму сливочным маслом',
+    'Взбить яйца с сахаром до пышной светлой массы примерно пять минут',
+    'Постепенно ввести просеянную муку с разрыхлителем и аккуратно перемешать лопаткой',
+    'Добавить нарезанные яблоки, вылить тесто в форму и выпекать сорок минут',
+    'Остудить пирог в форме, затем переложить на блюдо и посыпать сахарной пудрой',
+]
+INGREDIENTS = ['3 яйца', '200 г сахара', '200 г муки', '1 ч. л. разрыхлителя', '4 яблока']
+
+
+def charlotte(post_id, **fields):
+    values = {'title': 'Шарлотка с яблоками', 'ingredients': INGREDIENTS, 'steps': STEPS}
+    values.update(fields)
+    return make_recipe(post_id, **values)
+
+
+def recipes():
+    edited = list(STEPS)
+    edited[3] = edited[3].replace('сорок', 'тридцать пять')
+    return [
+        charlotte(1, post_date='2024-03-01T10:00:00'),
+        make_recipe(2, title='Борщ', ingredients=['свекла', 'капуста', 'картофель'],
+                    steps=['Сварить бульон из говядины', 'Добавить овощи и варить до готовности']),
+        charlotte(3, post_date='2025-05-01T10:00:00'),
+        charlotte(4, post_date='2024-09-01T10:00:00', steps=edited, cooking_time=None),
+        make_recipe(5, title='', ingredients=[], steps=[]),
+        make_recipe(6, title='', ingredients=[], steps=[]),
+    ]
+
+
+def cluster_ids(items, deduplicator=None):
+    deduplicator = deduplicator or RecipeDeduplicator()
+    return sorted(sorted(items[i].id for i in group) for group in deduplicator.clusters(items))
+
+
+def test_reposts_and_light_edits_cluster():
+    assert cluster_ids(recipes()) == [['recipe_1', 'recipe_3', 'recipe_4']]
+
+
+def test_clusters_do_not_depend_on_order():
+    items = recipes()
+    expected = cluster_ids(items)
+    for seed in range(10):
+        random.Random(seed).shuffle(items)
+        assert cluster_ids(items) == expected
+
+
+def test_stricter_threshold_keeps_only_exact_reposts():
+    assert cluster_ids(recipes(), RecipeDeduplicator(threshold=1.0)) == [['recipe_1', 'recipe_3']]
+
+
+def test_empty_recipes_have_no_signature():
+    deduplicator = RecipeDeduplicator()
+    assert deduplicator.signature(deduplicator.shingles(make_recipe(1, title='', ingredients=[], steps=[]))) is None
+
+
+def test_kept_recipe_stays_in_its_position():
+    kept, replaced = RecipeDeduplicator().deduplicate(recipes(), 'latest')
+    assert [recipe.id for recipe in kept] == ['recipe_2', 'recipe_3', 'recipe_5', 'recipe_6']
+    assert replaced == {'recipe_3': ['recipe_1', 'recipe_4']}
+
+
+def test_complete_prefers_more_filled_fields():
+    items = [charlotte(1, post_date='2025-01-01T10:00:00'),
+             charlotte(2, post_date='2025-06-01T10:00:00', difficulty=None)]
+    assert [r.id for r in RecipeDeduplicator().deduplicate(items, 'latest')[0]] == ['recipe_2']
+    assert [r.id for r in RecipeDeduplicator().deduplicate(items, 'complete')[0]] == ['recipe_1']
+
+
+def test_unknown_keep_policy():
+    with pytest.raises(ValueError):
+        RecipeDeduplicator().deduplicate(recipes(), 'first')
@@ -0,0 +1,29 @@
+import time
+
+from recipe_extractor import ExtractionMetrics
+
+
+class Pipeline:
+    def save_rankings(self):
+        time.sleep(0.05)
+    
+    def save_recipes(self):
+        time.sleep(0.02)
+        self.save_rankings()
+
+
+def test_nested_stage_time_is_not_counted_twice():
+    metrics = ExtractionMetrics()
+    pipeline = Pipeline()
+    for stage in ('save_recipes', 'save_rankings'):
+        setattr(pipeline, stage, metrics._timed(stage, getattr(pipeline, stage)))
+    start = time.perf_counter()
+    pipeline.save_recipes()
+    elapsed = time.perf_counter() - start
+    
+    outer, inner = metrics.stages['save_recipes'], metrics.stages['save_rankings']
+    assert outer[1] == inner[1] == 1
+    assert inner[0] >= 0.05
+    assert 0.02 <= outer[0] < 0.05
+    assert outer[0] + inner[0] <= elapsed
+    assert metrics._nested == []
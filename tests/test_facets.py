@@ -0,0 +1,83 @@
+import pytest
+
+from recipe_facets import FacetAggregator, cooking_time_bucket
+from recipe_model import cooking_minutes
+from recipe_search_index import SearchIndexBuilder
+
+from conftest import make_recipe
+
+
+def sample_recipes():
+    return [
+        make_recipe(1, difficulty='Средне', cuisine='Итальянская', categories=['Паста']),
+        make_recipe(2, difficulty='Легко'),
+        make_recipe(3, difficulty='Сложно', tags=['Жарка', 'Запекание']),
+        make_recipe(4, difficulty='Легко', cuisine=None, post_date='2025-03-02T08:00:00'),
+    ]
+
+
+def aggregate(recipes):
+    aggregator = FacetAggregator()
+    for recipe in recipes:
+        aggregator.add(recipe)
+    return aggregator
+
+
+def test_add_counts_every_dimension():
+    summary = aggregate(sample_recipes()).to_summary()
+    assert summary['total_recipes'] == 4
+    assert summary['difficulty_distribution'] == {'Средне': 1, 'Легко': 2, 'Сложно': 1}
+    assert summary['categories'] == {'Выпечка': 3, 'Паста': 1}
+    assert summary['cuisines'] == {'Русская': 2, 'Итальянская': 1}
+
+
+def test_remove_and_add_back_restores_counts_and_order():
+    recipes = sample_recipes()
+    aggregator = aggregate(recipes)
+    summary, facets = aggregator.to_summary(), aggregator.to_facets()
+
+    aggregator.remove(recipes[0].id)
+    assert aggregator.total == 3
+    assert 'Средне' not in aggregator.to_summary()['difficulty_distribution']
+    assert 'Итальянская' not in aggregator.to_facets()['facets']['cuisine_by_category']
+
+    aggregator.add(recipes[0])
+    assert aggregator.to_summary() == summary
+    assert list(aggregator.to_summary()['difficulty_distribution']) == list(summary['difficulty_distribution'])
+    assert aggregator.to_facets() == facets
+
+
+def test_adding_a_recipe_again_replaces_it():
+    recipes = sample_recipes()
+    aggregator = aggregate(recipes)
+    aggregator.add(make_recipe(2, difficulty='Сложно'))
+    assert aggregator.total == 4
+    assert aggregator.to_summary()['difficulty_distribution'] == {'Средне': 1, 'Легко': 1, 'Сложно': 2}
+
+
+def test_same_id_in_other_channel_is_counted_separately():
+    aggregator = aggregate([make_recipe(1, channel='first'), make_recipe(1, channel='second')])
+    assert aggregator.total == 2
+    assert aggregator.counts_of('channel') == {('first',): 1, ('second',): 1}
+    aggregator.remove('recipe_1', 'first')
+    assert aggregator.counts_of('channel') == {('second',): 1}
+
+
+@pytest.mark.parametrize('cooking_time, minutes, bucket', [
+    ('10 мин', 10, '≤15 мин'),
+    ('40 минут', 40, '31–60 мин'),
+    ('1 час', 60, '31–60 мин'),
+    ('6 час', 360, '>60 мин'),
+    (None, None, None),
+    ('', None, None),
+])
+def test_cooking_minutes_and_buckets_agree(cooking_time, minutes, bucket):
+    assert cooking_minutes(cooking_time) == minutes
+    assert cooking_time_bucket(cooking_time) == bucket
+
+
+def test_search_index_keeps_cooking_time_in_minutes():
+    builder = SearchIndexBuilder()
+    for post_id, cooking_time in ((1, '6 час'), (2, '25 минут'), (3, None)):
+        builder.add(make_recipe(post_id, cooking_time=cooking_time))
+    assert builder.to_index()['cooking_minutes'] == [360, 25, None]
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from recipe_extractor import ExtractionState, RecipeExtractor
+
+
+@pytest.fixture
+def export_path(tmp_path, export_messages):
+    def write(messages):
+        path = tmp_path / 'export.json'
+        path.write_text(json.dumps({'channel': 'test', 'messages': messages}, ensure_ascii=False),
+                        encoding='utf-8')
+        return str(path)
+    return write
+
+
+def full_extraction(path):
+    extractor = RecipeExtractor(path)
+    extractor.extract_recipes()
+    return [recipe.to_dict() for recipe in extractor.recipes]
+
+
+def incremental(path, state_path):
+    extractor = RecipeExtractor(path)
+    stats = extractor.extract_incremental(state_path)
+    return stats, [recipe.to_dict() for recipe in extractor.recipes]
+
+
+def test_reuses_unchanged_messages(tmp_path, export_path, export_messages):
+    messages = export_messages[:400]
+    path = export_path(messages)
+    state_path = str(tmp_path / 'state.db')
+    
+    stats, recipes = incremental(path, state_path)
+    assert stats == {'new': 400, 'edited': 0, 'unchanged': 0, 'removed': 0}
+    assert recipes == full_extraction(path)
+    assert recipes
+    
+    stats, again = incremental(path, state_path)
+    assert stats == {'new': 0, 'edited': 0, 'unchanged': 400, 'removed': 0}
+    assert again == recipes
+
+
+def test_edited_and_removed_messages(tmp_path, export_path, export_messages):
+    messages = [dict(message) for message in export_messages[:400]]
+    state_path = str(tmp_path / 'state.db')
+    incremental(export_path(messages), state_path)
+    
+    recipe_ids = [recipe['source_post_id'] for recipe in full_extraction(export_path(messages))]
+    edited = next(message for message in messages if message.get('id') == recipe_ids[0])
+    edited['text'] = 'Просто фото без рецепта'
+    edited['editDate'] = '2025-12-01T10:00:00'
+    messages = [message for message in messages if message.get('id') != recipe_ids[1]]
+    path = export_path(messages)
+    
+    stats, recipes = incremental(path, state_path)
+    assert stats == {'new': 0, 'edited': 1, 'unchanged': 398, 'removed': 1}
+    assert recipes == full_extraction(path)
+    assert recipe_ids[0] not in {recipe['source_post_id'] for recipe in recipes}
+
+
+def test_content_hash_catches_edits_without_edit_date(tmp_path, export_path, export_messages):
+    messages = [dict(message) for message in export_messages[:50]]
+    state_path = str(tmp_path / 'state.db')
+    incremental(export_path(messages), state_path)
+    messages[10]['text'] = 'Другой текст'
+    stats, _ = incremental(export_path(messages), state_path)
+    assert (stats['edited'], stats['unchanged']) == (1, 49)
+
+
+def test_new_fingerprint_wipes_the_state(tmp_path):
+    path = str(tmp_path / 'state.db')
+    state = ExtractionState(path, 'a')
+    state.update([(1, None, 'hash', None)], [])
+    state.close()
+    
+    state = ExtractionState(path, 'a')
+    assert state.load() == {1: (None, 'hash', None)}
+    state.close()
+    state = ExtractionState(path, 'b')
+    assert state.load() == {}
+    state.close()
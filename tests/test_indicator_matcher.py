@@ -0,0 +1,60 @@
+import re
+
+import pytest
+
+from recipe_extractor import IndicatorMatcher, RecipeExtractor
+
+
+def naive_scan(indicators, text):
+    """What the matcher replaces: one regex search per indicator"""
+    hits = {}
+    for indicator in indicators:
+        found = re.search(indicator, text)
+        if found:
+            hits[indicator] = found.group(0)
+    return hits
+
+
+def message_text(message) -> str:
+    text = message.get('text', '')
+    if isinstance(text, list):
+        text = ''.join(part if isinstance(part, str) else part.get('text', '') for part in text)
+    return text
+
+
+INDICATORS = [
+    'обжар', r'готов\w+', r'жар\w*', 'соль', 'под крышкой', r'\d+\s*мин\w*', 'ст. л.', r'(?:пар|варк)\w+',
+    r'(\d+)\s*(?:минут|час)', r'за \d+ минут', r'\d+\s*градус',
+]
+
+
+@pytest.mark.parametrize('text', [
+    '',
+    'обжарить лук, потом жарим ещё 5 минут под крышкой',
+    'приготовить и готовить: приготовление займет 10мин',
+    'соль, соленья, 1 ст. л. сахара',
+    'на пару, пароварка, варка',
+    'готов',
+    'разогреть до 180 градусов и запекать 1 час, потом ещё за 25 минут',
+    'за 3 минуты, 12 минут, за 7 минут; 2x3 градуса',
+])
+def test_scan_matches_one_search_per_indicator(text):
+    assert IndicatorMatcher(INDICATORS).scan(text) == naive_scan(INDICATORS, text)
+
+
+def test_scan_matches_on_export_posts(export_messages):
+    groups = RecipeExtractor.indicator_groups(RecipeExtractor)
+    indicators = list(dict.fromkeys(i for group in groups.values() for i in group))
+    matcher = IndicatorMatcher(indicators)
+    for message in export_messages:
+        text = message_text(message).lower()
+        assert matcher.scan(text) == naive_scan(indicators, text)
+
+
+def test_word_cache_is_bounded():
+    matcher = IndicatorMatcher(INDICATORS)
+    matcher.WORD_CACHE_SIZE = 4
+    for word in ['один', 'два', 'три', 'четыре', 'пять', 'обжарить']:
+        matcher.scan(word)
+    assert list(matcher._word_cache) == ['три', 'четыре', 'пять', 'обжарить']
+    assert matcher.scan('обжарить') == {'обжар': 'обжар', r'жар\w*': 'жарить'}
@@ -0,0 +1,61 @@
+import pytest
+
+from recipe_search_index import SearchIndexBuilder, parse_ingredient, recipes_with_ingredients
+
+from conftest import make_recipe
+
+
+@pytest.mark.parametrize('line, quantity, unit, name', [
+    ('200 мл белого вина', '200', 'мл', 'белого вина'),
+    ('3 ст. л. соевого соуса', '3', 'ст. л.', 'соевого соуса'),
+    ('мука — 200 г', '200', 'г', 'мука'),
+    ('курица 1 кг', '1', 'кг', 'курица'),
+    ('соль 1 ч. л.', '1', 'ч. л.', 'соль'),
+    ('лимон — ½ шт. (цедра и немного сока)', '½', None, 'лимон'),
+    ('оливковое масло', None, None, 'оливковое масло'),
+])
+def test_splits_amount_and_name(line, quantity, unit, name):
+    parsed = parse_ingredient(line)
+    assert (parsed.quantity, parsed.unit, parsed.name) == (quantity, unit, name)
+
+
+@pytest.mark.parametrize('line, stems', [
+    ('курица 1 кг', ('кур',)),
+    ('куриное филе — 2 шт.', ('кур', 'фил')),
+    ('лимонный сок — 1 ст. л', ('лимон', 'сок')),
+    ('сок ½ лимона', ('сок', 'лимон')),
+    ('2 зубчика чеснока', ('чеснок',)),
+    ('белое сухое вино или куриный бульон — 100 мл', ('вин', 'кур', 'бульон')),
+    ('соль, перец', ('сол', 'перец')),
+])
+def test_posts_every_noun_stem(line, stems):
+    assert parse_ingredient(line).stems == stems
+
+
+@pytest.mark.parametrize('line', [
+    '— добавил 400 г куриного фарша, поднял огонь и обжарил;',
+    'Разогреваем духовку до 200 градусов',
+    '2. Обжарить лук',
+    'В общем, на курицу весом в 2-2.5 кг уходит 90-100 минут, в последние 15 минут можно включить гриль',
+])
+def test_steps_are_not_ingredients(line):
+    parsed = parse_ingredient(line)
+    assert parsed.name is None and parsed.stems == ()
+
+
+def test_recipes_with_ingredients():
+    index = SearchIndexBuilder()
+    for recipe in [
+        make_recipe(1, ingredients=['курица — 1 кг', 'лимон — 1 шт.']),
+        make_recipe(2, ingredients=['2 куриные грудки', 'сок ½ лимона']),
+        make_recipe(3, ingredients=['куриная печень – 500 г', 'лимонный сок — 1 ч. л']),
+        make_recipe(4, ingredients=['курица 1 кг', 'добавил сок лимона и соль']),
+        make_recipe(5, ingredients=['лимон', 'куркума — 1 ч. л.']),
+    ]:
+        index.add(recipe)
+    index = index.to_index()
+    assert recipes_with_ingredients(index, ['курица', 'лимон']) == ['recipe_1', 'recipe_2', 'recipe_3']
+    assert recipes_with_ingredients(index, ['куриная печень']) == ['recipe_3']
+    assert recipes_with_ingredients(index, ['лимонный']) == ['recipe_1', 'recipe_2', 'recipe_3', 'recipe_5']
+    assert recipes_with_ingredients(index, ['курица', 'шафран']) == []
+    assert recipes_with_ingredients(index, ['']) == []
@@ -0,0 +1,68 @@
+import io
+import json
+
+import pytest
+
+from recipe_extractor import _JsonStreamReader, is_export, iter_export_messages
+
+VALUES = [
+    12345,
+    -0.25,
+    1e10,
+    'строка с "кавычками" и \\n',
+    True,
+    None,
+    {'text': [{'type': 'bold', 'text': 'Паста'}, ' карбонара'], 'views': 1200},
+    [],
+]
+
+
+def read_list(text, chunk_size):
+    reader = _JsonStreamReader(io.StringIO(text), chunk_size)
+    reader.expect('[')
+    values = []
+    while True:
+        values.append(reader.value())
+        separator = reader.take()
+        if separator == ']':
+            return values
+        if separator != ',':
+            raise ValueError(f"unexpected {separator!r}")
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64, 1 << 16])
+def test_values_split_at_any_chunk_boundary(chunk_size):
+    for text in (json.dumps(VALUES, ensure_ascii=False), json.dumps(VALUES, indent=2)):
+        assert read_list(text, chunk_size) == VALUES
+
+
+@pytest.mark.parametrize('number', ['12345', '-0.25', '1e10', '2.5E-3'])
+def test_number_cut_by_a_chunk_is_read_whole(number):
+    for chunk_size in range(1, len(number) + 2):
+        assert read_list(f"[{number},{number}]", chunk_size) == [float(number)] * 2
+        assert _JsonStreamReader(io.StringIO(number), chunk_size).value() == float(number)
+
+
+def test_malformed_input_raises():
+    with pytest.raises(ValueError):
+        read_list('[1; 2]', 4)
+    with pytest.raises(json.JSONDecodeError):
+        read_list('[{"a": ', 4)
+
+
+def test_iter_export_messages_matches_json_load(tmp_path):
+    export = {'name': 'Канал', 'messages': [{'id': i, 'text': 'т' * i} for i in range(50)], 'id': 7}
+    path = tmp_path / 'export.json'
+    path.write_text(json.dumps(export, ensure_ascii=False, indent=1), encoding='utf-8')
+    header = {}
+    assert list(iter_export_messages(str(path), header)) == export['messages']
+    assert header == {'name': 'Канал', 'id': 7}
+    assert is_export(str(path))
+
+
+def test_is_export_rejects_other_json(tmp_path):
+    path = tmp_path / 'recipes.json'
+    path.write_text(json.dumps({'metadata': {}, 'recipes': []}), encoding='utf-8')
+    assert not is_export(str(path))
+    path.write_text('{"messages": {}}', encoding='utf-8')
+    assert not is_export(str(path))
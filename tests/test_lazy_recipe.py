@@ -0,0 +1,55 @@
+import pickle
+
+from recipe_extractor import LazyRecipe, RecipeExtractor
+from recipe_model import Recipe
+
+from conftest import EXPORT_FILE
+
+
+def test_materialize_equals_build_recipe(export_messages):
+    extractor = RecipeExtractor(None)
+    built = 0
+    for message in export_messages:
+        recipe = extractor.build_recipe(message)
+        lazy = extractor.lazy_recipe(message)
+        assert (lazy is None) == (recipe is None)
+        if recipe is None:
+            continue
+        materialized = lazy.materialize()
+        assert materialized == recipe
+        assert materialized.to_dict() == recipe.to_dict()
+        assert all(getattr(materialized, field) == getattr(recipe, field) for field in Recipe.SOURCE_FIELDS)
+        built += 1
+    assert built > 300
+
+
+def test_fields_are_extracted_on_first_access(export_messages):
+    extractor = RecipeExtractor(None)
+    lazy = next(filter(None, map(extractor.lazy_recipe, export_messages)))
+    assert lazy.id == f"recipe_{lazy.source_post_id}"
+    assert lazy.title
+    assert 'title' in vars(lazy) and 'post' in vars(lazy)
+    assert not {'ingredients', 'steps', 'categorization'} & set(vars(lazy))
+    
+    # Reading the fields out of order gives the same recipe
+    steps, categories = lazy.steps, lazy.categories
+    recipe = extractor.build_recipe(lazy.message)
+    assert (steps, categories) == (recipe.steps, recipe.categories)
+    assert lazy.materialize() == recipe
+
+
+def test_pickled_lazy_recipe_is_a_recipe(export_messages):
+    extractor = RecipeExtractor(None)
+    lazy = next(filter(None, map(extractor.lazy_recipe, export_messages)))
+    copy = pickle.loads(pickle.dumps(lazy))
+    assert type(copy) is Recipe
+    assert copy == lazy.materialize()
+
+
+def test_lazy_extraction_matches_full_extraction():
+    full = RecipeExtractor(EXPORT_FILE)
+    full.extract_recipes()
+    lazy = RecipeExtractor(EXPORT_FILE)
+    lazy.extract_recipes(lazy=True)
+    assert all(isinstance(recipe, LazyRecipe) for recipe in lazy.recipes)
+    assert [recipe.to_dict() for recipe in lazy.recipes] == [recipe.to_dict() for recipe in full.recipes]
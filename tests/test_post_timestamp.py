@@ -0,0 +1,36 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from recipe_rankings import PopularityRanker, post_timestamp
+
+from conftest import make_recipe
+
+NOON = datetime(2025, 11, 11, 12, 0, tzinfo=timezone.utc).timestamp()
+
+
+@pytest.mark.parametrize('date', [
+    '2025-11-11T12:00:00',
+    '2025-11-11T12:00:00Z',
+    '2025-11-11T12:00:00.000Z',
+    '2025-11-11T12:00:00+00:00',
+    '2025-11-11T15:00:00+03:00',
+])
+def test_parses_export_dates(date):
+    assert post_timestamp(date) == NOON
+
+
+@pytest.mark.parametrize('date', [None, '', 'вчера', '2025-13-40T00:00:00', 1731326400])
+def test_unparseable_dates_give_none(date):
+    assert post_timestamp(date) is None
+
+
+def test_rankings_without_dates_skip_decay():
+    ranker = PopularityRanker()
+    for post_id, views in ((1, 10), (2, 30)):
+        ranker.add(make_recipe(post_id, post_date='', views=views))
+    assert ranker.reference is None
+    rankings = ranker.to_rankings()
+    assert rankings['reference_date'] is None
+    assert rankings['overall'] == ['recipe_2', 'recipe_1']
+    assert rankings['trending'] == []
@@ -0,0 +1,114 @@
+import json
+import os
+import re
+
+import pytest
+
+from recipe_model import Recipe, cooking_minutes
+from recipe_query_service import RecipeQueryIndex
+from recipe_search_index import SearchIndexBuilder
+
+from conftest import ROOT
+
+
+def stem_token(token, stemmer):
+    reflexive = next((ending for ending in stemmer['reflexive'] if token.endswith(ending)), None)
+    if reflexive and len(token) - len(reflexive) >= stemmer['min_stem_length']:
+        token = token[:-len(reflexive)]
+    for ending in stemmer['endings']:
+        if token.endswith(ending) and len(token) - len(ending) >= stemmer['min_stem_length']:
+            return token[:-len(ending)]
+    return token
+
+
+def index_ordinals(index, query):
+    """Python twin of searchIndexOrdinals in the app's recipeHelpers.ts"""
+    tokenizer = index['tokenizer']
+    normalized = query.lower() if tokenizer['lowercase'] else query
+    for old, new in tokenizer['folds'].items():
+        normalized = normalized.replace(old, new)
+    words = [word for word in re.findall(tokenizer['pattern'], normalized)
+             if len(word) >= tokenizer['min_length'] and not (tokenizer['drop_numbers'] and word.isdigit())]
+    if not words:
+        return None
+    result = None
+    for prefix in (stem_token(word, index['stemmer']) for word in words):
+        matches = {ordinal for token, ordinals in index['tokens'].items() if token.startswith(prefix)
+                   for ordinal in ordinals}
+        result = matches if result is None else result & matches
+    return result
+
+
+def filter_recipes(recipes, index, search='', categories=(), cuisines=(), difficulty=None, max_time=None):
+    """Python twin of filterRecipes in the app's recipeHelpers.ts"""
+    ordinals = index_ordinals(index, search) if search else None
+    found = None if ordinals is None else {index['recipe_ids'][ordinal] for ordinal in ordinals}
+    matched = []
+    for recipe in recipes:
+        if found is not None and recipe.id in index['recipe_ids']:
+            if recipe.id not in found:
+                continue
+        elif search:
+            fields = [recipe.title, *recipe.ingredients, recipe.description]
+            if not any(search.lower() in field.lower() for field in fields):
+                continue
+        if categories and not any(category in recipe.categories for category in categories):
+            continue
+        if cuisines and recipe.cuisine not in cuisines:
+            continue
+        if difficulty and recipe.difficulty != difficulty:
+            continue
+        minutes = cooking_minutes(recipe.cooking_time)
+        if max_time is not None and minutes is not None and minutes > max_time:
+            continue
+        matched.append(recipe.id)
+    return matched
+
+
+@pytest.fixture(scope='module')
+def catalog():
+    with open(os.path.join(ROOT, 'recipes_extracted.json'), 'r', encoding='utf-8') as f:
+        recipes = [Recipe.from_dict(recipe) for recipe in json.load(f)['recipes']]
+    builder = SearchIndexBuilder()
+    for recipe in recipes:
+        builder.add(recipe)
+    return recipes, builder.to_index(), RecipeQueryIndex(recipes)
+
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'search': 'курица'},
+    {'search': 'Куриное филе'},
+    {'search': 'кури'},
+    {'search': 'масло чеснок'},
+    {'search': 'жёлтки'},
+    {'search': 'паста', 'cuisines': ['Итальянская']},
+    {'search': '200'},
+    {'search': 'о'},
+    {'search': 'zzz'},
+    {'categories': ['Супы', 'Выпечка'], 'difficulty': 'Легко'},
+    {'max_time': 30},
+    {'search': 'мука', 'max_time': 60, 'categories': ['Выпечка']},
+])
+def test_service_matches_filter_recipes(catalog, filters):
+    recipes, index, service = catalog
+    expected = filter_recipes(recipes, index, **filters)
+    assert [recipes[ordinal].id for ordinal in service.matching(**filters)] == expected
+
+
+def test_stemmed_prefix_search_finds_other_word_forms(catalog):
+    recipes, _, service = catalog
+    assert set(service.matching(search='курицей')) == set(service.matching(search='курица'))
+    assert set(service.matching(search='жёлтки')) == set(service.matching(search='желтки'))
+    assert len(service.matching(search='кур')) > len(service.matching(search='курица'))
+
+
+def test_pages_come_from_the_cache(catalog):
+    _, _, service = catalog
+    first = service.query(page=1, page_size=5, search='сыр')
+    hits = service.cache.hits
+    second = service.query(page=2, page_size=5, search='Сыр')
+    assert service.cache.hits == hits + 1
+    assert second['total'] == first['total']
+    assert {r['id'] for r in first['recipes']}.isdisjoint(r['id'] for r in second['recipes'])
+    assert json.loads(service.query_json(page=2, page_size=5, search='сыр')) == second
@@ -0,0 +1,65 @@
+import gc
+import pickle
+
+from recipe_model import Recipe, Vocabulary, pool_context
+
+from conftest import make_recipe
+
+
+def full_recipe(**fields):
+    return make_recipe(7, categories=['Супы', 'Горячее'], tags=['Варка'], servings='4 порции',
+                       channel='kitchen', similar=['recipe_8'], views=1500, forwards=12,
+                       edit_date='2025-02-01T09:00:00', photos=['photos/a.jpg'], **fields)
+
+
+def source_fields(recipe):
+    return [getattr(recipe, field) for field in Recipe.SOURCE_FIELDS]
+
+
+def test_pickle_round_trip_keeps_source_fields():
+    recipe = full_recipe()
+    copy = pickle.loads(pickle.dumps(recipe))
+    assert copy == recipe
+    assert copy.to_dict() == recipe.to_dict()
+    assert source_fields(copy) == source_fields(recipe)
+
+
+def test_unpickled_recipe_uses_the_values_not_the_ids():
+    # Ids of another vocabulary mean nothing here; the values travel instead
+    other = Vocabulary()
+    other.id('Десерты')
+    recipe = full_recipe(vocabulary=other)
+    copy = pickle.loads(pickle.dumps(recipe))
+    assert copy._vocabulary is Vocabulary.shared()
+    assert (copy.categories, copy.tags, copy.difficulty) == (('Супы', 'Горячее'), ('Варка',), 'Легко')
+
+
+def test_recipes_survive_a_worker_process():
+    recipes = [full_recipe(), make_recipe(8, difficulty=None, cuisine=None)]
+    with pool_context().Pool(1) as pool:
+        copies = pool.map(pickle.loads, [pickle.dumps(recipe) for recipe in recipes])
+    assert copies == recipes
+    assert copies[1].difficulty is None and copies[1].cuisine is None
+
+
+def test_repeated_values_are_stored_once():
+    vocabulary = Vocabulary()
+    first = make_recipe(1, categories=['Выпечка', 'Десерты'], vocabulary=vocabulary)
+    second = make_recipe(2, categories=['Десерты'], tags=['Выпечка'], vocabulary=vocabulary)
+    assert len(vocabulary) == 5  # Выпечка, Десерты, Запекание, Легко, Русская
+    assert first.categories[1] is second.categories[0]
+    assert first.categories[0] is second.tags[0]
+    assert first.to_dict()['categories'] == ['Выпечка', 'Десерты']
+
+
+def test_shared_vocabulary_is_freed_with_its_last_recipe(monkeypatch):
+    # Recipes of other tests may still hold the current one
+    monkeypatch.setattr(Vocabulary, '_shared', None)
+    recipe = make_recipe(1)
+    vocabulary = Vocabulary.shared()
+    assert recipe._vocabulary is vocabulary
+    assert make_recipe(2)._vocabulary is vocabulary
+    
+    del recipe, vocabulary
+    gc.collect()
+    assert Vocabulary._shared() is None
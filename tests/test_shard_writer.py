@@ -0,0 +1,50 @@
+import json
+import os
+
+from recipe_catalog import ShardWriter
+
+from conftest import make_recipe
+
+
+def write_shards(output_dir, recipes, shard_size=2):
+    writer = ShardWriter(str(output_dir), shard_size)
+    for recipe in recipes:
+        writer.add(recipe)
+    with open(writer.close({'total_recipes': len(recipes)}), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def shard_files(output_dir):
+    return sorted(name for name in os.listdir(output_dir) if name.startswith('recipes-'))
+
+
+def test_same_recipes_give_same_shard_names(tmp_path):
+    recipes = [make_recipe(i) for i in range(5)]
+    first = write_shards(tmp_path / 'a', recipes)
+    second = write_shards(tmp_path / 'b', recipes)
+    assert first['shards'] == second['shards']
+    assert len(first['shards']) == 3
+    assert shard_files(tmp_path / 'a') == sorted(first['shards'])
+
+
+def test_manifest_points_at_the_shard_of_each_recipe(tmp_path):
+    recipes = [make_recipe(i) for i in range(5)]
+    manifest = write_shards(tmp_path, recipes)
+    for entry, recipe in zip(manifest['recipes'], recipes):
+        with open(tmp_path / manifest['shards'][entry['shard']], 'r', encoding='utf-8') as f:
+            bodies = {body['id']: body for body in json.load(f)}
+        assert bodies[entry['id']] == recipe.to_dict()
+        assert entry['categories'] == ['Выпечка']
+
+
+def test_changed_recipe_renames_only_its_shard(tmp_path):
+    recipes = [make_recipe(i) for i in range(5)]
+    before = write_shards(tmp_path, recipes)['shards']
+    recipes[3] = make_recipe(3, title='Новое название')
+    after = write_shards(tmp_path, recipes)['shards']
+    assert after[0] == before[0] and after[2] == before[2]
+    assert after[1] != before[1]
+    # The replaced shard outlives its manifest by one run
+    assert shard_files(tmp_path) == sorted(set(before) | set(after))
+    write_shards(tmp_path, recipes)
+    assert shard_files(tmp_path) == sorted(after)